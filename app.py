@@ -8,70 +8,278 @@ Esta versión elimina todos los emojis y caracteres especiales
 para garantizar compatibilidad con Windows.
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, send_file
+from flask import Flask, Request, render_template, request, jsonify, redirect, url_for, flash, session, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user, UserMixin
+from sqlalchemy import event, func, text, table, column, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine import Engine
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
-import json
 import sqlite3
-import shutil
-import csv
-import io
-import base64
 import logging
-from datetime import datetime, timedelta
+import logging.handlers
+import atexit
+import tempfile
+import hashlib
+import hmac
+import queue
+import threading
+from functools import lru_cache
+from time import monotonic, sleep
+from datetime import datetime, timedelta, time
+
+from utils.configuracion import invalidar_configuracion
+
+# orjson es opcional: si no está instalado se usa el JSON estándar de Flask
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# argon2-cffi es opcional: sin él se sigue usando PBKDF2 de Werkzeug
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+except ImportError:
+    PasswordHasher = None
+
+# flask-compress es opcional: sin él las respuestas se envían sin comprimir
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# Crear directorios necesarios (antes del logging: logs/ debe existir)
+for directorio in ('static/uploads', 'backups', 'logs', 'data', 'ssl'):
+    if not os.path.isdir(directorio):
+        os.makedirs(directorio, exist_ok=True)
 
 # Configurar logging SIN emojis
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# Las peticiones solo encolan el registro; un hilo (QueueListener) hace la
+# escritura en archivo y consola fuera del camino de la respuesta
+log_formato = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_destinos = [
+    logging.FileHandler('logs/app.log', encoding='utf-8'),
+    logging.StreamHandler()
+]
+for log_destino in log_destinos:
+    log_destino.setFormatter(log_formato)
+
+log_queue = queue.Queue(-1)
+log_queue_handler = logging.handlers.QueueHandler(log_queue)
+# Solo mensaje (y traceback): la fecha y el nivel los agrega el destino
+log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+log_listener = None
+
+def iniciar_log_listener():
+    """Iniciar el hilo que escribe los registros encolados"""
+    global log_listener
+    log_listener = logging.handlers.QueueListener(
+        log_queue_handler.queue, *log_destinos, respect_handler_level=True
+    )
+    log_listener.start()
+
+def reiniciar_log_listener():
+    """Tras fork(): cola nueva (la heredada guarda esperas del hilo del padre)"""
+    log_queue_handler.queue = queue.Queue(-1)
+    iniciar_log_listener()
 
-# Crear directorios necesarios
-os.makedirs('static/uploads', exist_ok=True)
-os.makedirs('backups', exist_ok=True)
-os.makedirs('logs', exist_ok=True)
-os.makedirs('data', exist_ok=True)
-os.makedirs('ssl', exist_ok=True)
+def detener_log_listener():
+    if log_listener is not None:
+        log_listener.stop()
+
+iniciar_log_listener()
+atexit.register(detener_log_listener)
+# Los hilos no sobreviven a fork(): con servidores que precargan la app
+# (gunicorn --preload) cada worker debe levantar su propio listener
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reiniciar_log_listener)
+
+logging.basicConfig(level=logging.INFO, handlers=[log_queue_handler])
+
+class UploadRequest(Request):
+    """Request que vuelca los archivos subidos a disco pasado 512KB
+
+    Evita mantener en RAM hasta MAX_CONTENT_LENGTH por cada subida
+    concurrente. Para endpoints de un solo archivo conviene además leer
+    request.stream en bloques de 64KB directamente al destino, sin
+    decodificar multipart.
+    """
+    max_form_memory_size = 512 * 1024
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Directorio temporal del sistema, fuera de static/: los archivos a
+        # medio subir no quedan publicados. FileStorage.save() luego copia el
+        # contenido al destino final
+        return tempfile.SpooledTemporaryFile(max_size=512 * 1024, mode='rb+')
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask respaldado por orjson (extensión en C)"""
+    
+    def dumps(self, obj, **kwargs):
+        # Las fechas se guardan en UTC sin zona: serializarlas con sufijo 'Z'
+        return orjson.dumps(
+            obj, default=self.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+        ).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        # orjson no soporta object_hook, que usa la sesión para tuplas y fechas
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
 
 # Configuración de la aplicación
 app = Flask(__name__)
+app.request_class = UploadRequest
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'emergency-system-villa-allende-2024-secure'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///emergency_system.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('EMERG_DATABASE_URI', 'sqlite:///emergency_system.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool dimensionado para el servidor threaded=True. Para pruebas con
+# 'sqlite:///:memory:' usar {'poolclass': StaticPool} (una sola conexión).
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+    # Flask corre con threaded=True: permitir compartir conexiones entre hilos
+    'connect_args': {'check_same_thread': False, 'timeout': 30}
+}
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Compresión de los listados JSON (claves repetidas: se reducen varias veces)
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
 
 # Inicializar extensiones
-db = SQLAlchemy(app)
+# Sin expirar al commit: leer llamado.id después del commit no repite el SELECT
+db = SQLAlchemy(app, session_options={'expire_on_commit': False})
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Debe iniciar sesión para acceder.'
+if Compress is not None:
+    Compress(app)
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """Aplicar PRAGMAs de rendimiento en cada conexión SQLite nueva"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    # WAL: los lectores no se bloquean durante las escrituras
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # NORMAL es seguro con WAL y evita un fsync por cada commit
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64MB
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256MB
+    cursor.execute("PRAGMA foreign_keys=ON")
+    # Por conexión: checkpoint automático del WAL cada 1000 páginas.
+    # El bloqueo de escritura lo maneja timeout=30 de connect_args
+    # (busy_timeout). locking_mode queda NORMAL: scripts y diagnósticos
+    # abren la misma base en otros procesos.
+    cursor.execute("PRAGMA wal_autocheckpoint=1000")
+    cursor.close()
 
 # =============== CONSTANTES ===============
-BARRIOS = [
+# Tuplas inmutables: se comparten tal cual con todos los templates
+BARRIOS = (
     'Altos del Valle', 'Altos del Chateau', 'Barrio Norte', 'Barrio Sur',
     'Centro', 'Country Club', 'El Libertador', 'La Alameda',
     'La Estanzuela', 'Las Caletas', 'Los Aromos', 'Los Jazmines',
     'Los Naranjos', 'Los Paraísos', 'Manantiales', 'Parque Norte',
     'Quebrada de las Rosas', 'Residencial Norte', 'San Alfonso',
     'San Ignacio', 'Valle del Golf', 'Villa del Dique', 'Otro'
-]
+)
 
-TIPOS_EMERGENCIA = [
+TIPOS_EMERGENCIA = (
     'Médica', 'Bomberos', 'Seguridad', 'Defensa Civil', 'Otros'
-]
+)
+
+PRIORIDADES = ('rojo', 'amarillo', 'verde')
+ROLES = ('admin', 'supervisor', 'operador')
+TIPOS_GUARDIA = ('novedad', 'incidente', 'llamado', 'administrativo', 'sistema')
+
+# Conjuntos para validar pertenencia en O(1)
+BARRIOS_SET = frozenset(BARRIOS)
+TIPOS_EMERGENCIA_SET = frozenset(TIPOS_EMERGENCIA)
+PRIORIDADES_SET = frozenset(PRIORIDADES)
+ROLES_SET = frozenset(ROLES)
+TIPOS_GUARDIA_SET = frozenset(TIPOS_GUARDIA)
+
+# PBKDF2 con 150k iteraciones: seguro y ~4x más barato que el default de Werkzeug
+PASSWORD_HASH_ITERACIONES = 150000
+PASSWORD_HASH_METHOD = f'pbkdf2:sha256:{PASSWORD_HASH_ITERACIONES}'
+# Argon2id (si está disponible): más resistente y más barato por verificación
+password_hasher = (
+    PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+    if PasswordHasher is not None else None
+)
+
+def generar_hash_password(password):
+    """Hashear una contraseña con Argon2id, o PBKDF2 si argon2 no está instalado"""
+    if password_hasher is not None:
+        return password_hasher.hash(password)
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD)
 
-PRIORIDADES = ['rojo', 'amarillo', 'verde']
-ROLES = ['admin', 'supervisor', 'operador']
-TIPOS_GUARDIA = ['novedad', 'incidente', 'llamado', 'administrativo', 'sistema']
+def verificar_password(password_hash, password):
+    """Verificar una contraseña contra un hash Argon2 o PBKDF2 (legado)"""
+    if password_hash.startswith('$argon2'):
+        if password_hasher is None:
+            return False
+        try:
+            return password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+def requiere_rehash(password_hash):
+    """Indicar si el hash debe regenerarse con los parámetros actuales"""
+    if password_hasher is not None:
+        if not password_hash.startswith('$argon2'):
+            return True
+        return password_hasher.check_needs_rehash(password_hash)
+    # Sin argon2: regenerar los PBKDF2 con menos iteraciones que las actuales
+    metodo = password_hash.split('$', 1)[0].split(':')
+    if metodo[0] != 'pbkdf2' or len(metodo) < 3 or not metodo[2].isdigit():
+        return False
+    return int(metodo[2]) < PASSWORD_HASH_ITERACIONES
+
+# Verificaciones exitosas recientes: evitan repetir el hash costoso cuando el
+# mismo usuario vuelve a autenticarse. La clave incluye el hash guardado, así
+# que un cambio de contraseña la invalida sola. Nunca se cachean fallos.
+VERIFICACIONES_CACHE = {}
+VERIFICACIONES_TTL = 300  # segundos
+VERIFICACIONES_MAXIMO = 4096
+
+def verificar_password_cacheado(password_hash, password):
+    """verificar_password con cache en memoria de los aciertos recientes"""
+    clave = hmac.new(
+        app.config['SECRET_KEY'].encode(),
+        password_hash.encode() + b'\0' + password.encode(),
+        hashlib.sha256
+    ).digest()
+    ahora = monotonic()
+    expira = VERIFICACIONES_CACHE.get(clave)
+    if expira is not None and expira > ahora:
+        return True
+    if not verificar_password(password_hash, password):
+        return False
+    if len(VERIFICACIONES_CACHE) >= VERIFICACIONES_MAXIMO:
+        VERIFICACIONES_CACHE.clear()
+    VERIFICACIONES_CACHE[clave] = ahora + VERIFICACIONES_TTL
+    return True
+
+# Hash de referencia para igualar el tiempo de respuesta con usuarios inexistentes
+DUMMY_HASH = generar_hash_password('x')
 
 # =============== MODELOS DE BASE DE DATOS ===============
 
@@ -86,7 +294,7 @@ class Usuario(UserMixin, db.Model):
     email = db.Column(db.String(120), nullable=True)
     telefono = db.Column(db.String(20), nullable=True)
     rol = db.Column(db.String(20), nullable=False, default='operador')
-    activo = db.Column(db.Boolean, default=True)
+    activo = db.Column(db.Boolean, default=True, index=True)
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     ultimo_login = db.Column(db.DateTime, nullable=True)
     llamados_atendidos = db.Column(db.Integer, default=0)
@@ -99,12 +307,15 @@ class Usuario(UserMixin, db.Model):
 
 class Persona(db.Model):
     __tablename__ = 'personas'
+    __table_args__ = (
+        db.Index('ix_personas_apellido_nombre', 'apellido', 'nombre'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     apellido = db.Column(db.String(100), nullable=False)
-    documento = db.Column(db.String(20), nullable=True)
-    telefono = db.Column(db.String(20), nullable=True)
+    documento = db.Column(db.String(20), nullable=True, index=True)
+    telefono = db.Column(db.String(20), nullable=True, index=True)
     email = db.Column(db.String(120), nullable=True)  # CAMPO EMAIL
     direccion = db.Column(db.String(200), nullable=True)
     barrio = db.Column(db.String(100), nullable=True)
@@ -126,17 +337,20 @@ class Persona(db.Model):
 
 class Llamado(db.Model):
     __tablename__ = 'llamados'
+    __table_args__ = (
+        db.Index('ix_llamados_estado_fecha', 'estado', 'fecha'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    fecha = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False, index=True)
     
     # Datos del llamante
     nombre_llamante = db.Column(db.String(100), nullable=False)
     telefono_llamante = db.Column(db.String(20), nullable=True)
     
     # Datos del afectado
-    persona_id = db.Column(db.Integer, db.ForeignKey('personas.id'), nullable=True)
+    persona_id = db.Column(db.Integer, db.ForeignKey('personas.id'), nullable=True, index=True)
     nombre_afectado = db.Column(db.String(100), nullable=True)
     edad_afectado = db.Column(db.Integer, nullable=True)
     sexo_afectado = db.Column(db.String(1), nullable=True)
@@ -154,7 +368,7 @@ class Llamado(db.Model):
     protocolo_107 = db.Column(db.Text, nullable=True)
     
     # Estado
-    estado = db.Column(db.String(20), default='activo')
+    estado = db.Column(db.String(20), default='activo', index=True)
     derivado_a = db.Column(db.String(100), nullable=True)
     observaciones = db.Column(db.Text, nullable=True)
     fecha_cierre = db.Column(db.DateTime, nullable=True)
@@ -162,16 +376,21 @@ class Llamado(db.Model):
     # WhatsApp
     whatsapp_enviado = db.Column(db.Boolean, default=False)
     whatsapp_respuesta = db.Column(db.Text, nullable=True)
+    
+    # selectin: al listar llamados, un único SELECT ... IN trae los operadores
+    usuario = db.relationship('Usuario', lazy='selectin')
 
 class Guardia(db.Model):
     __tablename__ = 'guardias'
     
     id = db.Column(db.Integer, primary_key=True)
-    fecha = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False, index=True)
     actividad = db.Column(db.Text, nullable=False)
     tipo = db.Column(db.String(20), default='novedad')
     observaciones = db.Column(db.Text, nullable=True)
+    
+    usuario = db.relationship('Usuario', lazy='selectin')
 
 class Configuracion(db.Model):
     __tablename__ = 'configuracion'
@@ -186,50 +405,181 @@ class Configuracion(db.Model):
 
 # =============== FUNCIONES DE LOGIN ===============
 
+# Cache de usuarios por proceso: evita un SELECT por cada petición autenticada.
+# Guarda copias UsuarioSesion, no instancias de Usuario: una instancia sigue
+# ligada a la sesión de la petición que la cargó y un rollback la expira.
+USUARIOS_CACHE = {}
+USUARIOS_CACHE_TTL = 30  # segundos
+
+class UsuarioSesion(UserMixin):
+    """Datos del usuario autenticado, independientes de la sesión de SQLAlchemy"""
+    
+    def __init__(self, fila):
+        self.id = fila.id
+        self.username = fila.username
+        self.nombre = fila.nombre
+        self.apellido = fila.apellido
+        self.rol = fila.rol
+    
+    @property
+    def nombre_completo(self):
+        return f"{self.nombre} {self.apellido}"
+
+def invalidar_usuario(usuario_id):
+    """Descartar un usuario de la cache (tras modificarlo)"""
+    USUARIOS_CACHE.pop(usuario_id, None)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return Usuario.query.get(int(user_id))
+    uid = int(user_id)
+    ahora = monotonic()
+    entrada = USUARIOS_CACHE.get(uid)
+    if entrada is not None and entrada[0] > ahora:
+        return entrada[1]
+    # Solo las columnas que usan las vistas (sin password_hash)
+    fila = db.session.query(
+        Usuario.id, Usuario.username, Usuario.nombre, Usuario.apellido, Usuario.rol
+    ).filter(Usuario.id == uid).first()
+    if fila is None:
+        return None
+    usuario = UsuarioSesion(fila)
+    USUARIOS_CACHE[uid] = (ahora + USUARIOS_CACHE_TTL, usuario)
+    return usuario
 
 # =============== FUNCIONES DE INICIALIZACIÓN ===============
 
+def init_personas_fts():
+    """Crear índice FTS5 de personas y triggers de sincronización"""
+    with db.engine.begin() as conn:
+        existe = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='personas_fts'"
+        ).first()
+        
+        conn.exec_driver_sql("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS personas_fts USING fts5(
+                nombre, apellido, documento, telefono, email,
+                content='personas', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        conn.exec_driver_sql("""
+            CREATE TRIGGER IF NOT EXISTS personas_fts_ai AFTER INSERT ON personas BEGIN
+                INSERT INTO personas_fts(rowid, nombre, apellido, documento, telefono, email)
+                VALUES (new.id, new.nombre, new.apellido, new.documento, new.telefono, new.email);
+            END
+        """)
+        conn.exec_driver_sql("""
+            CREATE TRIGGER IF NOT EXISTS personas_fts_ad AFTER DELETE ON personas BEGIN
+                INSERT INTO personas_fts(personas_fts, rowid, nombre, apellido, documento, telefono, email)
+                VALUES ('delete', old.id, old.nombre, old.apellido, old.documento, old.telefono, old.email);
+            END
+        """)
+        conn.exec_driver_sql("""
+            CREATE TRIGGER IF NOT EXISTS personas_fts_au AFTER UPDATE ON personas BEGIN
+                INSERT INTO personas_fts(personas_fts, rowid, nombre, apellido, documento, telefono, email)
+                VALUES ('delete', old.id, old.nombre, old.apellido, old.documento, old.telefono, old.email);
+                INSERT INTO personas_fts(rowid, nombre, apellido, documento, telefono, email)
+                VALUES (new.id, new.nombre, new.apellido, new.documento, new.telefono, new.email);
+            END
+        """)
+        
+        # Indexar personas cargadas antes de existir la tabla FTS
+        if not existe:
+            conn.exec_driver_sql("INSERT INTO personas_fts(personas_fts) VALUES ('rebuild')")
+            logging.info("Índice de búsqueda de personas generado")
+
+def init_versiones_listado():
+    """Crear contadores de versión de los listados y sus triggers
+    
+    Los triggers viven en la base: registran también las escrituras de
+    otros procesos, de los scripts de mantenimiento y de SQL directo.
+    """
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS versiones_listado (
+                tabla TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO versiones_listado (tabla) VALUES ('llamados'), ('personas')"
+        )
+        for tabla in ('llamados', 'personas'):
+            for sufijo, operacion in (('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE')):
+                conn.exec_driver_sql(f"""
+                    CREATE TRIGGER IF NOT EXISTS {tabla}_version_{sufijo} AFTER {operacion} ON {tabla} BEGIN
+                        UPDATE versiones_listado SET version = version + 1 WHERE tabla = '{tabla}';
+                    END
+                """)
+        # El listado de llamados incluye el nombre del operador
+        conn.exec_driver_sql("""
+            CREATE TRIGGER IF NOT EXISTS usuarios_version_au AFTER UPDATE OF nombre ON usuarios BEGIN
+                UPDATE versiones_listado SET version = version + 1 WHERE tabla = 'llamados';
+            END
+        """)
+
 def init_database():
     """Inicializar base de datos SIMPLE - sin migraciones complejas"""
     try:
         # NO ejecutar migración compleja, solo crear tablas si no existen
         db.create_all()
         
+        # create_all() no agrega índices a tablas ya existentes:
+        # crearlos explícitamente para bases de datos anteriores
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(db.engine, checkfirst=True)
+                except Exception as e:
+                    logging.warning(f"No se pudo crear índice {index.name}: {e}")
+        
+        # Búsqueda de personas con FTS5
+        try:
+            init_personas_fts()
+        except Exception as e:
+            logging.warning(f"No se pudo crear índice de búsqueda FTS5: {e}")
+        
+        # Versiones de los listados para los ETag
+        init_versiones_listado()
+        
+        # Estadísticas del planificador al día (PRAGMA optimize corre ANALYZE
+        # solo si hace falta). page_size no se fija: ya es 4096 por defecto
+        # y en WAL no puede cambiarse.
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+        
+        iniciar_checkpoint_wal()
+        
         # Crear usuario admin si no existe - CONSULTA SIMPLE
         try:
-            # Usar consulta SQL directa para evitar problemas de ORM
-            conn = sqlite3.connect('emergency_system.db')
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT COUNT(*) FROM usuarios WHERE username = 'admin'")
-            admin_count = cursor.fetchone()[0]
-            
-            if admin_count == 0:
-                # Crear admin con SQL directo
-                password_hash = generate_password_hash('123456')
-                cursor.execute("""
+            # Usar SQL directo sobre el engine (misma conexión y PRAGMAs que la app)
+            with db.engine.begin() as conn:
+                # Alta idempotente: el índice único de username resuelve el
+                # caso "ya existe" sin un SELECT previo
+                password_hash = generar_hash_password('123456')
+                result = conn.execute(text("""
                     INSERT INTO usuarios (
                         username, password_hash, nombre, apellido, email, rol, 
-                        activo, llamados_atendidos, intentos_login
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    'admin', password_hash, 'Administrador', 'Sistema',
-                    'admin@villaallende.gov.ar', 'admin', 1, 0, 0
-                ))
-                
-                # Crear guardia inicial
-                cursor.execute("""
-                    INSERT INTO guardias (usuario_id, actividad, tipo)
-                    VALUES (1, 'Sistema inicializado con BD limpia', 'sistema')
-                """)
+                        activo, fecha_creacion, llamados_atendidos, intentos_login
+                    ) VALUES (:username, :password_hash, :nombre, :apellido, :email, :rol,
+                              :activo, :fecha, :llamados_atendidos, :intentos_login)
+                    ON CONFLICT(username) DO NOTHING
+                """), {
+                    'username': 'admin', 'password_hash': password_hash,
+                    'nombre': 'Administrador', 'apellido': 'Sistema',
+                    'email': 'admin@villaallende.gov.ar', 'rol': 'admin',
+                    'activo': 1, 'fecha': datetime.utcnow(),
+                    'llamados_atendidos': 0, 'intentos_login': 0
+                })
                 
-                conn.commit()
-                logging.info("Usuario administrador creado: admin / 123456")
-            
-            conn.close()
+                if result.rowcount == 1:
+                    # Crear guardia inicial
+                    conn.execute(text("""
+                        INSERT INTO guardias (fecha, usuario_id, actividad, tipo)
+                        VALUES (:fecha, :usuario_id, 'Sistema inicializado con BD limpia', 'sistema')
+                    """), {'fecha': datetime.utcnow(), 'usuario_id': result.lastrowid})
+                    
+                    logging.info("Usuario administrador creado: admin / 123456")
             
         except Exception as e:
             logging.error(f"Error en inicialización simple: {e}")
@@ -240,6 +590,266 @@ def init_database():
         logging.error(f"Error inicializando base de datos: {e}")
         raise
 
+# =============== CACHE HTTP DE LISTADOS ===============
+
+@event.listens_for(Usuario, 'after_update')
+def invalidar_usuario_modificado(mapper, connection, target):
+    invalidar_usuario(target.id)
+
+def etag_listado(tabla, *extra):
+    """ETag barato de un listado: firma de la tabla sin leer sus filas
+    
+    La versión la mantienen los triggers de versiones_listado; MAX(id) y
+    COUNT(*) distinguen además una base recreada desde cero.
+    """
+    firma = db.session.execute(text(f"""
+        SELECT (SELECT version FROM versiones_listado WHERE tabla = :tabla),
+               MAX(id), COUNT(*)
+        FROM {tabla}
+    """), {'tabla': tabla}).one()
+    base = repr((tuple(firma), extra))
+    return hashlib.md5(base.encode('utf-8')).hexdigest()
+
+def respuesta_no_modificada(etag):
+    """Respuesta 304 si el cliente ya tiene la versión actual"""
+    # flask-compress devuelve el ETag de las respuestas comprimidas como
+    # "<etag>:br" o "<etag>:gzip": comparar sin ese sufijo
+    for etag_cliente in request.if_none_match.as_set(include_weak=True):
+        if etag_cliente.split(':', 1)[0] == etag:
+            response = app.response_class(status=304)
+            response.set_etag(etag_cliente)
+            return response
+    return None
+
+def respuesta_con_etag(response, etag):
+    """Adjuntar ETag y forzar revalidación en cada consulta"""
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+# =============== CACHE DE CONFIGURACIÓN ===============
+
+# obtener_configuracion() e invalidar_configuracion() viven en
+# utils/configuracion.py (sin depender de app); aquí solo se conectan los
+# eventos del modelo para descartar la cache ante cambios ORM
+@event.listens_for(Configuracion, 'after_insert')
+@event.listens_for(Configuracion, 'after_update')
+@event.listens_for(Configuracion, 'after_delete')
+def configuracion_modificada(mapper, connection, target):
+    invalidar_configuracion()
+
+# =============== FUNCIONES DE BÚSQUEDA ===============
+
+# Tabla virtual FTS5 (no forma parte de los modelos; se crea en init_database)
+personas_fts = table('personas_fts', column('rowid'))
+
+def fts_query(texto):
+    """Convertir texto libre en una consulta FTS5 de prefijos segura"""
+    terminos = [t.replace('"', '""') for t in texto.split()]
+    return ' '.join(f'"{t}"*' for t in terminos)
+
+# =============== FUNCIONES DE ALTA ===============
+
+def datos_llamado(data):
+    """Columnas de un llamado a partir del JSON recibido"""
+    return {
+        'usuario_id': current_user.id,
+        'nombre_llamante': data.get('nombre_llamante', ''),
+        'telefono_llamante': data.get('telefono_llamante', ''),
+        'nombre_afectado': data.get('nombre_afectado', ''),
+        'direccion': data.get('direccion', ''),
+        'barrio': data.get('barrio', ''),
+        'tipo_emergencia': data.get('tipo_emergencia', ''),
+        'motivo_llamado': data.get('motivo_llamado', ''),
+        'prioridad': data.get('prioridad', 'verde')
+    }
+
+def validar_llamado(data):
+    """Devolver un mensaje de error si el llamado no es válido, o None"""
+    if data.get('prioridad', 'verde') not in PRIORIDADES_SET:
+        return f"Prioridad inválida: {data.get('prioridad')}"
+    return None
+
+def datos_persona(data):
+    """Columnas de una persona a partir del JSON recibido"""
+    return {
+        'nombre': data.get('nombre', ''),
+        'apellido': data.get('apellido', ''),
+        'documento': data.get('documento', ''),
+        'telefono': data.get('telefono', ''),
+        'email': data.get('email', ''),  # CAMPO EMAIL
+        'direccion': data.get('direccion', ''),
+        'barrio': data.get('barrio', '')
+    }
+
+# =============== ESCRITURAS DIFERIDAS DE LOGIN ===============
+
+# Las actualizaciones de login se encolan y un hilo las aplica en lote,
+# así el fsync del commit no queda en el camino de la respuesta
+login_queue = queue.Queue()
+LOGIN_BATCH_SIZE = 50
+LOGIN_BATCH_INTERVAL = 0.25  # segundos
+login_writer_lock = threading.Lock()
+login_writer_thread = None
+
+def aplicar_evento_login(evento, usuario_id, momento, password_hash=None):
+    """Aplicar en la sesión un evento de login encolado"""
+    invalidar_usuario(usuario_id)
+    if evento == 'exito':
+        valores = {'ultimo_login': momento, 'intentos_login': 0, 'bloqueado_hasta': None}
+        if password_hash:
+            # Migración transparente del hash (p. ej. PBKDF2 -> Argon2id)
+            valores['password_hash'] = password_hash
+        db.session.execute(
+            update(Usuario).where(Usuario.id == usuario_id).values(**valores)
+        )
+    else:
+        # Incremento atómico en SQL: sin leer la fila ni carreras entre hilos
+        db.session.execute(text("""
+            UPDATE usuarios
+            SET intentos_login = COALESCE(intentos_login, 0) + 1,
+                bloqueado_hasta = CASE
+                    WHEN COALESCE(intentos_login, 0) + 1 >= 5 THEN :bloqueo
+                    ELSE bloqueado_hasta
+                END
+            WHERE id = :id
+        """), {'bloqueo': momento + timedelta(minutes=30), 'id': usuario_id})
+
+def login_writer():
+    """Hilo que agrupa los eventos de login y los confirma en un commit"""
+    while True:
+        eventos = [login_queue.get()]
+        limite = datetime.now() + timedelta(seconds=LOGIN_BATCH_INTERVAL)
+        while len(eventos) < LOGIN_BATCH_SIZE:
+            restante = (limite - datetime.now()).total_seconds()
+            if restante <= 0:
+                break
+            try:
+                eventos.append(login_queue.get(timeout=restante))
+            except queue.Empty:
+                break
+        
+        with app.app_context():
+            try:
+                for evento in eventos:
+                    aplicar_evento_login(*evento)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Error guardando datos de login: {e}")
+
+def encolar_evento_login(evento, usuario_id, password_hash=None):
+    """Encolar un evento de login ('exito' o 'fallo'), iniciando el hilo si hace falta"""
+    global login_writer_thread
+    if login_writer_thread is None:
+        with login_writer_lock:
+            if login_writer_thread is None:
+                login_writer_thread = threading.Thread(
+                    target=login_writer, name='login-writer', daemon=True
+                )
+                login_writer_thread.start()
+    login_queue.put((evento, usuario_id, datetime.utcnow(), password_hash))
+
+# =============== CHECKPOINT PERIÓDICO DEL WAL ===============
+
+# El autocheckpoint no puede truncar el WAL mientras haya lectores activos;
+# un checkpoint TRUNCATE periódico evita que el archivo -wal crezca sin límite
+WAL_CHECKPOINT_INTERVAL = 300  # segundos
+wal_checkpoint_lock = threading.Lock()
+wal_checkpoint_thread = None
+
+def checkpoint_wal():
+    """Hilo que ejecuta PRAGMA wal_checkpoint(TRUNCATE) periódicamente"""
+    while True:
+        sleep(WAL_CHECKPOINT_INTERVAL)
+        try:
+            with app.app_context(), db.engine.connect() as conn:
+                ocupado, paginas, copiadas = conn.exec_driver_sql(
+                    "PRAGMA wal_checkpoint(TRUNCATE)"
+                ).one()
+            if ocupado:
+                logging.debug(f"Checkpoint WAL parcial: {copiadas}/{paginas} páginas")
+        except Exception as e:
+            logging.warning(f"Error en checkpoint del WAL: {e}")
+
+def iniciar_checkpoint_wal():
+    """Iniciar el hilo de checkpoint del WAL (una sola vez por proceso)"""
+    global wal_checkpoint_thread
+    with wal_checkpoint_lock:
+        if wal_checkpoint_thread is None:
+            wal_checkpoint_thread = threading.Thread(
+                target=checkpoint_wal, name='wal-checkpoint', daemon=True
+            )
+            wal_checkpoint_thread.start()
+
+# =============== TEMPLATES ESTÁTICOS ===============
+
+@lru_cache(maxsize=32)
+def render_estatico_cache(nombre, mtimes):
+    return render_template(nombre)
+
+def render_estatico(nombre):
+    """Render cacheado de templates sin contexto dinámico
+
+    Solo para páginas que no dependen del usuario ni de la petición. La
+    clave incluye la fecha de modificación del template y de base.html,
+    y se renderiza sin cache si hay mensajes flash pendientes.
+    """
+    if '_flashes' in session:
+        return render_template(nombre)
+    carpeta = os.path.join(app.root_path, app.template_folder)
+    try:
+        mtimes = tuple(
+            os.path.getmtime(os.path.join(carpeta, t)) for t in (nombre, 'base.html')
+        )
+    except OSError:
+        mtimes = None
+    if mtimes is None:
+        return render_template(nombre)
+    return render_estatico_cache(nombre, mtimes)
+
+# =============== ESTADÍSTICAS ===============
+
+# Los conteos del dashboard admiten unos segundos de atraso: se recalculan
+# como máximo una vez cada ESTADISTICAS_TTL segundos por proceso
+ESTADISTICAS_CACHE = {'expira': 0.0, 'datos': None}
+ESTADISTICAS_TTL = 30  # segundos
+
+def obtener_estadisticas_dashboard():
+    """Estadísticas del dashboard (cacheadas ESTADISTICAS_TTL segundos)"""
+    ahora = monotonic()
+    if ESTADISTICAS_CACHE['datos'] is not None and ESTADISTICAS_CACHE['expira'] > ahora:
+        return ESTADISTICAS_CACHE['datos']
+    
+    # Estadísticas básicas - un solo SELECT con subconsultas escalares.
+    # Cada conteo se resuelve con un índice (EXPLAIN QUERY PLAN:
+    # "USING COVERING INDEX"), sin recorrer las filas de la tabla.
+    # Llamado.fecha se guarda en UTC: rango semiabierto [hoy, mañana) en UTC
+    today_midnight = datetime.combine(datetime.utcnow().date(), time.min)
+    tomorrow_midnight = today_midnight + timedelta(days=1)
+    row = db.session.execute(db.select(
+        db.select(func.count(Llamado.id))
+          .scalar_subquery().label('total_llamados'),
+        db.select(func.count(Llamado.id))
+          .where(Llamado.fecha >= today_midnight, Llamado.fecha < tomorrow_midnight)
+          .scalar_subquery().label('llamados_hoy'),
+        db.select(func.count(Llamado.id))
+          .where(Llamado.estado == 'activo')
+          .scalar_subquery().label('llamados_activos'),
+        db.select(func.count(Persona.id))
+          .scalar_subquery().label('total_personas'),
+        db.select(func.count(Usuario.id))
+          .where(Usuario.activo == True)
+          .scalar_subquery().label('usuarios_activos'),
+        db.select(func.count(Guardia.id))
+          .scalar_subquery().label('total_guardias')
+    )).one()
+    stats = row._asdict()
+    
+    ESTADISTICAS_CACHE['datos'] = stats
+    ESTADISTICAS_CACHE['expira'] = ahora + ESTADISTICAS_TTL
+    return stats
+
 # =============== RUTAS PRINCIPALES ===============
 
 @app.route('/')
@@ -256,33 +866,27 @@ def login():
         
         usuario = Usuario.query.filter_by(username=username, activo=True).first()
         
-        if usuario and check_password_hash(usuario.password_hash, password):
+        if usuario is None:
+            # Mismo costo que una verificación real: no revelar si el usuario existe
+            verificar_password(DUMMY_HASH, password)
+        
+        if usuario and verificar_password_cacheado(usuario.password_hash, password):
             # Verificar bloqueo
             if usuario.bloqueado_hasta and usuario.bloqueado_hasta > datetime.utcnow():
                 flash('Usuario bloqueado temporalmente. Intente más tarde.', 'error')
                 return render_template('login.html')
             
-            # Login exitoso
+            # Login exitoso (el guardado se hace en segundo plano)
             login_user(usuario)
-            usuario.ultimo_login = datetime.utcnow()
-            usuario.intentos_login = 0
-            usuario.bloqueado_hasta = None
-            
-            try:
-                db.session.commit()
-            except:
-                pass  # No fallar por problemas de guardado
+            nuevo_hash = None
+            if requiere_rehash(usuario.password_hash):
+                nuevo_hash = generar_hash_password(password)
+            encolar_evento_login('exito', usuario.id, nuevo_hash)
             
             return redirect(url_for('dashboard'))
         else:
             if usuario:
-                usuario.intentos_login += 1
-                if usuario.intentos_login >= 5:
-                    usuario.bloqueado_hasta = datetime.utcnow() + timedelta(minutes=30)
-                try:
-                    db.session.commit()
-                except:
-                    pass
+                encolar_evento_login('fallo', usuario.id)
             
             flash('Usuario o contraseña incorrectos', 'error')
     
@@ -291,6 +895,8 @@ def login():
 @app.route('/logout')
 @login_required
 def logout():
+    # Descartar la copia cacheada: un login posterior la vuelve a leer
+    invalidar_usuario(current_user.id)
     logout_user()
     flash('Sesión cerrada correctamente', 'success')
     return redirect(url_for('login'))
@@ -298,37 +904,29 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    # Estadísticas básicas
-    stats = {
-        'llamados_hoy': Llamado.query.filter(
-            Llamado.fecha >= datetime.now().replace(hour=0, minute=0, second=0)
-        ).count(),
-        'llamados_activos': Llamado.query.filter_by(estado='activo').count(),
-        'total_personas': Persona.query.count(),
-        'usuarios_activos': Usuario.query.filter_by(activo=True).count()
-    }
+    stats = obtener_estadisticas_dashboard()
     
     return render_template('dashboard.html', stats=stats)
 
 @app.route('/llamados')
 @login_required
 def llamados():
-    return render_template('llamados.html')
+    return render_estatico('llamados.html')
 
 @app.route('/personas')
 @login_required
 def personas():
-    return render_template('personas.html')
+    return render_estatico('personas.html')
 
 @app.route('/guardias')
 @login_required
 def guardias():
-    return render_template('guardias.html')
+    return render_estatico('guardias.html')
 
 @app.route('/consultas')
 @login_required
 def consultas():
-    return render_template('consultas.html')
+    return render_estatico('consultas.html')
 
 @app.route('/configuracion')
 @login_required
@@ -336,7 +934,7 @@ def configuracion():
     if current_user.rol not in ['admin', 'supervisor']:
         flash('Acceso denegado', 'error')
         return redirect(url_for('dashboard'))
-    return render_template('configuracion.html')
+    return render_estatico('configuracion.html')
 
 # =============== API ENDPOINTS BÁSICOS ===============
 
@@ -345,20 +943,28 @@ def configuracion():
 def api_llamados():
     if request.method == 'POST':
         try:
-            data = request.get_json()
+            data = request.get_json(cache=False)
+            
+            for item in (data if isinstance(data, list) else [data]):
+                error = validar_llamado(item)
+                if error:
+                    return jsonify({'success': False, 'message': error}), 400
+            
+            # Lote de llamados: un solo INSERT multi-fila y un solo commit
+            if isinstance(data, list):
+                db.session.bulk_insert_mappings(
+                    Llamado, [datos_llamado(d) for d in data]
+                )
+                db.session.commit()
+                
+                return jsonify({
+                    'success': True,
+                    'message': f'{len(data)} llamados registrados correctamente',
+                    'cantidad': len(data)
+                })
             
             # Crear llamado básico
-            llamado = Llamado(
-                usuario_id=current_user.id,
-                nombre_llamante=data.get('nombre_llamante', ''),
-                telefono_llamante=data.get('telefono_llamante', ''),
-                nombre_afectado=data.get('nombre_afectado', ''),
-                direccion=data.get('direccion', ''),
-                barrio=data.get('barrio', ''),
-                tipo_emergencia=data.get('tipo_emergencia', ''),
-                motivo_llamado=data.get('motivo_llamado', ''),
-                prioridad=data.get('prioridad', 'verde')
-            )
+            llamado = Llamado(**datos_llamado(data))
             
             db.session.add(llamado)
             db.session.commit()
@@ -370,27 +976,45 @@ def api_llamados():
             })
             
         except Exception as e:
+            app.logger.exception("Error creando llamado")
             db.session.rollback()
             return jsonify({'success': False, 'message': str(e)})
     
     else:  # GET
         try:
-            llamados = Llamado.query.order_by(Llamado.fecha.desc()).limit(50).all()
+            limite, desplazamiento = parametros_paginacion(50)
+            etag = etag_listado('llamados', limite, desplazamiento)
+            no_modificada = respuesta_no_modificada(etag)
+            if no_modificada:
+                return no_modificada
             
-            return jsonify({
+            # Solo las columnas del listado: tuplas, sin instancias ORM
+            # ni los campos TEXT largos (motivo, protocolo, observaciones)
+            # El operador se resuelve en el mismo SELECT (sin N+1)
+            llamados = db.session.query(
+                Llamado.id, Llamado.fecha, Llamado.tipo_emergencia,
+                Llamado.prioridad, Llamado.direccion, Llamado.barrio,
+                Llamado.estado, Usuario.nombre.label('usuario_nombre')
+            ).outerjoin(
+                Usuario, Llamado.usuario_id == Usuario.id
+            ).order_by(Llamado.fecha.desc()).limit(limite).offset(desplazamiento).all()
+            
+            return respuesta_con_etag(jsonify({
                 'success': True,
                 'llamados': [{
                     'id': l.id,
-                    'fecha': l.fecha.strftime('%d/%m/%Y %H:%M'),
+                    'fecha': formato_fecha(l.fecha),
                     'tipo_emergencia': l.tipo_emergencia,
                     'prioridad': l.prioridad,
                     'direccion': l.direccion,
                     'barrio': l.barrio,
-                    'estado': l.estado
+                    'estado': l.estado,
+                    'usuario_nombre': l.usuario_nombre or ''
                 } for l in llamados]
-            })
+            }), etag)
             
         except Exception as e:
+            app.logger.exception("Error listando llamados")
             return jsonify({'success': False, 'message': str(e)})
 
 @app.route('/api/personas', methods=['GET', 'POST'])
@@ -398,17 +1022,22 @@ def api_llamados():
 def api_personas():
     if request.method == 'POST':
         try:
-            data = request.get_json()
+            data = request.get_json(cache=False)
             
-            persona = Persona(
-                nombre=data.get('nombre', ''),
-                apellido=data.get('apellido', ''),
-                documento=data.get('documento', ''),
-                telefono=data.get('telefono', ''),
-                email=data.get('email', ''),  # CAMPO EMAIL
-                direccion=data.get('direccion', ''),
-                barrio=data.get('barrio', '')
-            )
+            # Lote de personas: un solo INSERT multi-fila y un solo commit
+            if isinstance(data, list):
+                db.session.bulk_insert_mappings(
+                    Persona, [datos_persona(d) for d in data]
+                )
+                db.session.commit()
+                
+                return jsonify({
+                    'success': True,
+                    'message': f'{len(data)} personas registradas correctamente',
+                    'cantidad': len(data)
+                })
+            
+            persona = Persona(**datos_persona(data))
             
             db.session.add(persona)
             db.session.commit()
@@ -420,54 +1049,92 @@ def api_personas():
             })
             
         except Exception as e:
+            app.logger.exception("Error registrando persona")
             db.session.rollback()
             return jsonify({'success': False, 'message': str(e)})
     
     else:  # GET
         try:
             buscar = request.args.get('q', '')
+            limite, desplazamiento = parametros_paginacion(100)
             
-            query = Persona.query
-            if buscar:
-                query = query.filter(
+            etag = etag_listado('personas', buscar, limite, desplazamiento)
+            no_modificada = respuesta_no_modificada(etag)
+            if no_modificada:
+                return no_modificada
+            
+            # Proyección de columnas: filas livianas, sin objetos ORM
+            columnas = (
+                Persona.id, Persona.nombre, Persona.apellido, Persona.documento,
+                Persona.telefono, Persona.email, Persona.direccion, Persona.barrio
+            )
+            query = db.session.query(*columnas)
+            if buscar.strip():
+                # Búsqueda por índice invertido FTS5 (prefijos, sin acentos)
+                query = query.join(
+                    personas_fts, personas_fts.c.rowid == Persona.id
+                ).filter(
+                    text('personas_fts MATCH :q')
+                ).params(q=fts_query(buscar))
+            
+            try:
+                personas = query.order_by(Persona.apellido, Persona.nombre).limit(limite).offset(desplazamiento).all()
+            except OperationalError:
+                # Sin tabla FTS5 (BD no inicializada): búsqueda LIKE
+                db.session.rollback()
+                query = db.session.query(*columnas).filter(
                     (Persona.nombre.contains(buscar)) |
                     (Persona.apellido.contains(buscar)) |
                     (Persona.documento.contains(buscar)) |
                     (Persona.telefono.contains(buscar)) |
                     (Persona.email.contains(buscar))  # INCLUIR EMAIL
                 )
+                personas = query.order_by(Persona.apellido, Persona.nombre).limit(limite).offset(desplazamiento).all()
             
-            personas = query.order_by(Persona.apellido, Persona.nombre).limit(100).all()
-            
-            return jsonify({
+            return respuesta_con_etag(jsonify({
                 'success': True,
                 'personas': [{
                     'id': p.id,
-                    'nombre_completo': p.nombre_completo,
+                    'nombre_completo': f"{p.nombre} {p.apellido}",
                     'documento': p.documento or '',
                     'telefono': p.telefono or '',
                     'email': p.email or '',  # INCLUIR EMAIL
                     'direccion': p.direccion or '',
                     'barrio': p.barrio or ''
                 } for p in personas]
-            })
+            }), etag)
             
         except Exception as e:
+            app.logger.exception("Error buscando personas")
             return jsonify({'success': False, 'message': str(e)})
 
 # =============== FUNCIONES DE UTILIDAD ===============
 
-@app.context_processor
-def inject_globals():
-    """Inyectar variables globales en templates"""
-    return {
-        'BARRIOS': BARRIOS,
-        'TIPOS_EMERGENCIA': TIPOS_EMERGENCIA,
-        'PRIORIDADES': PRIORIDADES,
-        'ROLES': ROLES,
-        'TIPOS_GUARDIA': TIPOS_GUARDIA,
-        'datetime': datetime
-    }
+def formato_fecha(dt):
+    """dd/mm/aaaa hh:mm sin pasar por el parser de formato de strftime"""
+    return f"{dt.day:02d}/{dt.month:02d}/{dt.year} {dt.hour:02d}:{dt.minute:02d}"
+
+# Tope de filas por página en los listados de la API
+LIMITE_MAXIMO_PAGINA = 500
+
+def parametros_paginacion(limite_defecto):
+    """Leer ?limit y ?offset de la petición, acotados a valores válidos"""
+    limite = request.args.get('limit', limite_defecto, type=int)
+    desplazamiento = request.args.get('offset', 0, type=int)
+    return min(max(limite, 1), LIMITE_MAXIMO_PAGINA), max(desplazamiento, 0)
+
+# Construido una sola vez al importar el módulo
+TEMPLATE_GLOBALS = {
+    'BARRIOS': BARRIOS,
+    'TIPOS_EMERGENCIA': TIPOS_EMERGENCIA,
+    'PRIORIDADES': PRIORIDADES,
+    'ROLES': ROLES,
+    'TIPOS_GUARDIA': TIPOS_GUARDIA,
+    'datetime': datetime
+}
+
+# Globales del entorno Jinja: sin context_processor que se ejecute en cada render
+app.jinja_env.globals.update(TEMPLATE_GLOBALS)
 
 # =============== MANEJO DE ERRORES ===============
 
@@ -10,8 +10,47 @@ y por qué SQLAlchemy no puede encontrar la columna llamados_atendidos.
 
 import sqlite3
 import os
+import argparse
+import functools
 from datetime import datetime
 
+# PRAGMAs de solo lectura: el diagnóstico no debe cambiar el modo de journal
+# (fallaría además con un archivo de solo lectura)
+PRAGMAS_LECTURA = """
+    PRAGMA cache_size=-20000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA busy_timeout=5000;
+    PRAGMA mmap_size=268435456;
+"""
+
+def open_database(path='emergency_system.db'):
+    """Abrir la base de datos con PRAGMAs de rendimiento para lectura"""
+    conn = sqlite3.connect(path)
+    conn.executescript(PRAGMAS_LECTURA)
+    # Filas accesibles por nombre de columna además de por posición
+    conn.row_factory = sqlite3.Row
+    return conn
+
+@functools.lru_cache(maxsize=None)
+def get_engine(url='sqlite:///emergency_system.db'):
+    """Engine de SQLAlchemy memorizado por URL
+
+    StaticPool mantiene una única conexión abierta: el diagnóstico corre en un
+    solo hilo y así no se reabren el archivo, el -wal ni el -shm en cada uso.
+    """
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import StaticPool
+    
+    engine = create_engine(url, poolclass=StaticPool,
+                           connect_args={'check_same_thread': False})
+    
+    # Mismos PRAGMAs que la conexión directa
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        dbapi_connection.executescript(PRAGMAS_LECTURA)
+    
+    return engine
+
 def print_banner():
     print("=" * 60)
     print("DIAGNOSTICO COMPLETO DE BASE DE DATOS")
@@ -45,39 +84,50 @@ def check_database_file():
     
     return True
 
-def inspect_table_structure(conn, table_name):
+def load_all_columns(conn, tables):
+    """Estructura de varias tablas en una sola consulta sobre sqlite_master
+
+    Devuelve {tabla: [fila, ...]} con filas sqlite3.Row (cid, name, type,
+    notnull, dflt_value, pk); las tablas inexistentes no aparecen.
+    """
+    marcadores = ','.join('?' * len(tables))
+    rows = conn.execute(f"""
+        SELECT m.name AS tabla, p.cid, p.name, p.type, p."notnull", p.dflt_value, p.pk
+        FROM sqlite_master m JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table' AND m.name IN ({marcadores})
+        ORDER BY m.name, p.cid
+    """, tuple(tables)).fetchall()
+    columns = {}
+    for row in rows:
+        columns.setdefault(row['tabla'], []).append(row)
+    return columns
+
+# Formato de una línea del listado de columnas (se compila una sola vez)
+FORMATO_COLUMNA = "  [{cid}] {name:<20} {type:<15} {null:<8} DEFAULT: {default:<10} {pk}".format
+
+def inspect_table_structure(table_name, columns):
     """Inspeccionar estructura detallada de una tabla"""
-    print(f"\n2. INSPECCIONANDO TABLA '{table_name}'")
+    print(f"\n2. INSPECCIONANDO TABLA '{table_name}'", flush=True)
     print("-" * 40)
     
-    cursor = conn.cursor()
-    
     # Verificar si la tabla existe
-    cursor.execute("""
-        SELECT name FROM sqlite_master 
-        WHERE type='table' AND name=?
-    """, (table_name,))
-    
-    if not cursor.fetchone():
+    if columns is None:
         print(f"ERROR: Tabla '{table_name}' no existe")
         return False
     
     print(f"OK: Tabla '{table_name}' existe")
     
-    # Obtener información detallada de columnas
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = cursor.fetchall()
-    
     print(f"Columnas encontradas ({len(columns)}):")
-    for col in columns:
-        cid, name, type_, notnull, default, pk = col
-        print(f"  [{cid}] {name:<20} {type_:<15} "
-              f"{'NOT NULL' if notnull else 'NULL':<8} "
-              f"DEFAULT: {default if default else 'None':<10} "
-              f"{'PK' if pk else ''}")
+    print('\n'.join(
+        FORMATO_COLUMNA(cid=col['cid'], name=col['name'], type=col['type'],
+                        null='NOT NULL' if col['notnull'] else 'NULL',
+                        default=col['dflt_value'] or 'None',
+                        pk='PK' if col['pk'] else '')
+        for col in columns
+    ))
     
     # Verificar específicamente la columna problemática
-    column_names = [col[1] for col in columns]
+    column_names = {col['name'] for col in columns}
     if table_name == 'usuarios':
         critical_columns = ['llamados_atendidos', 'intentos_login', 'bloqueado_hasta']
         print(f"\nVerificacion de columnas criticas:")
@@ -91,22 +141,18 @@ def inspect_table_structure(conn, table_name):
 
 def test_direct_sql_query(conn):
     """Probar consulta SQL directa"""
-    print(f"\n3. PROBANDO CONSULTAS SQL DIRECTAS")
+    print(f"\n3. PROBANDO CONSULTAS SQL DIRECTAS", flush=True)
     print("-" * 40)
     
-    cursor = conn.cursor()
-    
     try:
         # Probar consulta simple
-        cursor.execute("SELECT COUNT(*) FROM usuarios")
-        count = cursor.fetchone()[0]
+        count = conn.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
         print(f"OK: Consulta basica exitosa - {count} usuarios en la tabla")
         
         # Probar consulta con columna problemática
-        cursor.execute("SELECT username, llamados_atendidos FROM usuarios LIMIT 1")
-        result = cursor.fetchone()
+        result = conn.execute("SELECT username, llamados_atendidos FROM usuarios LIMIT 1").fetchone()
         if result:
-            print(f"OK: Consulta con 'llamados_atendidos' exitosa - {result}")
+            print(f"OK: Consulta con 'llamados_atendidos' exitosa - {tuple(result)}")
         else:
             print("AVISO: No hay usuarios en la tabla")
         
@@ -118,17 +164,14 @@ def test_direct_sql_query(conn):
 
 def test_sqlalchemy_connection():
     """Probar conexión con SQLAlchemy"""
-    print(f"\n4. PROBANDO CONEXION SQLALCHEMY")
+    print(f"\n4. PROBANDO CONEXION SQLALCHEMY", flush=True)
     print("-" * 40)
     
     try:
-        from sqlalchemy import create_engine, text
-        
-        # Crear engine
-        engine = create_engine('sqlite:///emergency_system.db')
+        from sqlalchemy import text
         
         # Probar conexión
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             result = conn.execute(text("SELECT COUNT(*) FROM usuarios"))
             count = result.fetchone()[0]
             print(f"OK: SQLAlchemy conecta correctamente - {count} usuarios")
@@ -150,17 +193,18 @@ def test_sqlalchemy_connection():
         print(f"ERROR importando SQLAlchemy: {e}")
         return False
 
-def check_database_integrity(conn):
-    """Verificar integridad de la base de datos"""
-    print(f"\n5. VERIFICANDO INTEGRIDAD DE BASE DE DATOS")
+def check_database_integrity(conn, deep=False):
+    """Verificar integridad de la base de datos
+
+    Por defecto usa quick_check (páginas y estructura del árbol, sin cruzar
+    índices contra tablas). Con deep=True ejecuta el integrity_check completo.
+    """
+    print(f"\n5. VERIFICANDO INTEGRIDAD DE BASE DE DATOS", flush=True)
     print("-" * 40)
     
-    cursor = conn.cursor()
-    
     try:
-        # PRAGMA integrity_check
-        cursor.execute("PRAGMA integrity_check")
-        result = cursor.fetchone()
+        # PRAGMA quick_check (o integrity_check completo con --deep)
+        result = conn.execute("PRAGMA integrity_check" if deep else "PRAGMA quick_check").fetchone()
         if result[0] == 'ok':
             print("OK: Integridad de base de datos correcta")
         else:
@@ -168,8 +212,7 @@ def check_database_integrity(conn):
             return False
         
         # PRAGMA foreign_key_check
-        cursor.execute("PRAGMA foreign_key_check")
-        fk_errors = cursor.fetchall()
+        fk_errors = conn.execute("PRAGMA foreign_key_check").fetchall()
         if not fk_errors:
             print("OK: No hay errores de claves foráneas")
         else:
@@ -183,7 +226,7 @@ def check_database_integrity(conn):
 
 def suggest_solution():
     """Sugerir solución basada en los resultados"""
-    print(f"\n6. SUGERENCIAS DE SOLUCION")
+    print(f"\n6. SUGERENCIAS DE SOLUCION", flush=True)
     print("-" * 40)
     
     print("Basado en el diagnóstico, las posibles soluciones son:")
@@ -204,6 +247,11 @@ def suggest_solution():
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Diagnóstico de la base de datos")
+    parser.add_argument('--deep', action='store_true',
+                        help="verificación de integridad completa (más lenta)")
+    args = parser.parse_args()
+    
     print_banner()
     
     # Verificar archivo
@@ -212,23 +260,26 @@ def main():
     
     # Conectar a la base de datos
     try:
-        conn = sqlite3.connect('emergency_system.db')
+        conn = open_database()
         print("OK: Conexión SQLite exitosa")
     except Exception as e:
         print(f"ERROR: No se puede conectar a la base de datos - {e}")
         return 1
     
+    # Estructura de ambas tablas en una sola consulta
+    columns = load_all_columns(conn, ('usuarios', 'personas'))
+    
     # Inspeccionar tabla usuarios
-    usuarios_ok = inspect_table_structure(conn, 'usuarios')
+    usuarios_ok = inspect_table_structure('usuarios', columns.get('usuarios'))
     
     # Inspeccionar tabla personas
-    personas_ok = inspect_table_structure(conn, 'personas')
+    personas_ok = inspect_table_structure('personas', columns.get('personas'))
     
     # Probar consultas directas
     sql_ok = test_direct_sql_query(conn)
     
     # Verificar integridad
-    integrity_ok = check_database_integrity(conn)
+    integrity_ok = check_database_integrity(conn, deep=args.deep)
     
     conn.close()
     
@@ -258,4 +309,7 @@ def main():
 
 if __name__ == '__main__':
     import sys
+    # stdout con buffer completo (no por línea): se vuelca al comenzar cada
+    # sección (flush=True en los encabezados) y al salir
+    sys.stdout.reconfigure(line_buffering=False)
     sys.exit(main())
\ No newline at end of file
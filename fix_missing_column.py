@@ -9,7 +9,9 @@ Este script agrega la columna faltante 'llamados_atendidos' en la tabla usuarios
 
 import sqlite3
 import os
-from datetime import datetime
+import time
+
+from utils.mantenimiento import open_database, seed_password_hash
 
 def print_banner():
     print("=" * 60)
@@ -20,10 +22,10 @@ def print_banner():
 
 def check_column_exists(conn, table_name, column_name):
     """Verificar si una columna existe en una tabla"""
-    cursor = conn.cursor()
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [column[1] for column in cursor.fetchall()]
-    return column_name in columns
+    cursor = conn.execute(
+        "SELECT 1 FROM pragma_table_info(?) WHERE name = ?", (table_name, column_name)
+    )
+    return cursor.fetchone() is not None
 
 def add_missing_column(conn):
     """Agregar la columna llamados_atendidos si no existe"""
@@ -35,8 +37,7 @@ def add_missing_column(conn):
     
     try:
         print("➕ Agregando columna 'llamados_atendidos'...")
-        cursor = conn.cursor()
-        cursor.execute("ALTER TABLE usuarios ADD COLUMN llamados_atendidos INTEGER DEFAULT 0")
+        conn.execute("ALTER TABLE usuarios ADD COLUMN llamados_atendidos INTEGER DEFAULT 0")
         conn.commit()
         print("✅ Columna 'llamados_atendidos' agregada exitosamente")
         return True
@@ -46,7 +47,7 @@ def add_missing_column(conn):
 
 def verify_all_columns(conn):
     """Verificar que todas las columnas necesarias existan"""
-    print("\n🔍 Verificando todas las columnas de la tabla usuarios...")
+    print("\n🔍 Verificando todas las columnas de la tabla usuarios...", flush=True)
     
     required_columns = [
         'id', 'username', 'password_hash', 'nombre', 'apellido', 
@@ -54,9 +55,8 @@ def verify_all_columns(conn):
         'ultimo_login', 'llamados_atendidos', 'intentos_login', 'bloqueado_hasta'
     ]
     
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA table_info(usuarios)")
-    existing_columns = [column[1] for column in cursor.fetchall()]
+    cursor = conn.execute("SELECT name FROM pragma_table_info(?)", ('usuarios',))
+    existing_columns = {row[0] for row in cursor.fetchall()}
     
     missing_columns = []
     for col in required_columns:
@@ -75,23 +75,14 @@ def verify_all_columns(conn):
 
 def create_admin_user_if_not_exists(conn):
     """Crear usuario admin si no existe"""
-    print("\n👤 Verificando usuario administrador...")
-    
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM usuarios WHERE username = 'admin'")
-    admin_count = cursor.fetchone()[0]
-    
-    if admin_count > 0:
-        print(f"✅ Usuario admin ya existe ({admin_count} registros)")
-        return True
+    print("\n👤 Verificando usuario administrador...", flush=True)
     
     try:
-        print("➕ Creando usuario administrador...")
-        from werkzeug.security import generate_password_hash
+        password_hash = seed_password_hash('123456')
         
-        password_hash = generate_password_hash('123456')
-        cursor.execute("""
-            INSERT INTO usuarios (
+        # OR IGNORE sobre username UNIQUE: sin SELECT previo, si ya existe no hace nada
+        cursor = conn.execute("""
+            INSERT OR IGNORE INTO usuarios (
                 username, password_hash, nombre, apellido, email, rol, 
                 activo, llamados_atendidos, intentos_login
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -99,8 +90,12 @@ def create_admin_user_if_not_exists(conn):
             'admin', password_hash, 'Administrador', 'Sistema', 
             'admin@villaallende.gov.ar', 'admin', 1, 0, 0
         ))
-        
         conn.commit()
+        
+        if cursor.rowcount == 0:
+            print("✅ Usuario admin ya existe")
+            return True
+        
         print("✅ Usuario admin creado exitosamente")
         print("   Usuario: admin")
         print("   Contraseña: 123456")
@@ -110,6 +105,18 @@ def create_admin_user_if_not_exists(conn):
         print(f"❌ Error creando usuario admin: {e}")
         return False
 
+def backup_database(backup_path, path='emergency_system.db'):
+    """Copia compacta de la base con VACUUM INTO
+
+    Lee una instantánea consistente (incluye lo que aún esté en el WAL, sin
+    checkpoint previo) y escribe solo las páginas en uso, sin las libres.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("VACUUM INTO ?", (backup_path,))
+    finally:
+        conn.close()
+
 def main():
     """Función principal"""
     print_banner()
@@ -121,17 +128,16 @@ def main():
         return 1
     
     # Hacer backup por seguridad
-    backup_name = f"emergency_system.db.backup_fix_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    backup_name = f"emergency_system.db.backup_fix_{time.strftime('%Y%m%d_%H%M%S')}"
     try:
-        import shutil
-        shutil.copy2('emergency_system.db', backup_name)
+        backup_database(backup_name)
         print(f"📁 Backup creado: {backup_name}")
     except Exception as e:
         print(f"⚠️ No se pudo crear backup: {e}")
     
     # Conectar a la base de datos
     try:
-        conn = sqlite3.connect('emergency_system.db')
+        conn = open_database()
         print("✅ Conectado a la base de datos")
     except Exception as e:
         print(f"❌ Error conectando a la base de datos: {e}")
@@ -175,4 +181,7 @@ def main():
 
 if __name__ == '__main__':
     import sys
+    # stdout con buffer completo (no por línea): se vuelca al comenzar cada
+    # sección (flush=True en los encabezados) y al salir
+    sys.stdout.reconfigure(line_buffering=False)
     sys.exit(main())
\ No newline at end of file
@@ -10,13 +10,14 @@ a la nueva estructura, agregando campos faltantes y manteniendo datos existentes
 IMPORTANTE: Ahora compatible con la nueva estructura integrada en app.py
 """
 
-import sqlite3
 import os
 import shutil
 from datetime import datetime
 import logging
 import sys
 
+from utils.mantenimiento import open_database, checkpoint_database
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,11 +28,73 @@ logging.basicConfig(
     ]
 )
 
+# Buffer para copiar en espacio de usuario: el de shutil es de 64 KiB fuera de Windows
+COPY_BUFSIZE = 1024 * 1024
+
+def copy_file_buffered(src, dst, length=COPY_BUFSIZE):
+    """Copiar un archivo por bloques grandes con lectura secuencial"""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if hasattr(os, 'posix_fadvise'):
+            # Aviso de lectura secuencial: el kernel amplía el read-ahead
+            os.posix_fadvise(fsrc.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        shutil.copyfileobj(fsrc, fdst, length)
+
+# ioctl FICLONE de Linux (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+def clone_file(src, dst):
+    """Clonar el archivo con reflink o copiarlo dentro del kernel (solo Linux)
+
+    FICLONE comparte los bloques en sistemas copy-on-write (btrfs, XFS con
+    reflink, bcachefs): no se mueven bytes y el costo no depende del tamaño.
+    Si no se admite (ext4, tmpfs, otro dispositivo), copy_file_range copia en
+    el kernel y en NFS 4.2/CIFS puede delegar la copia al servidor.
+    Devuelve False si ninguno de los dos está disponible.
+    """
+    import fcntl
+    
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return True
+        except OSError:
+            pass
+        
+        if not hasattr(os, 'copy_file_range'):
+            return False
+        try:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_BUFSIZE * 64):
+                pass
+        except OSError:
+            return False
+        return True
+
+def copy_database_file(src, dst):
+    """Copiar el archivo de la base por el camino más rápido disponible
+
+    - Linux: reflink o copy_file_range (ver clone_file); si no, sendfile
+      dentro del kernel vía shutil.copyfile.
+    - macOS: shutil.copyfile usa fcopyfile (copia en el kernel, no clona).
+    - Windows: no hay camino nativo; shutil.copyfile copia en espacio de
+      usuario por bloques de 1 MiB (solo copy2 usa CopyFile2, desde 3.12).
+    - Resto: copy_file_buffered, bloques de 1 MiB en lugar de 64 KiB.
+    """
+    if sys.platform.startswith('linux') and clone_file(src, dst):
+        return
+    if sys.platform.startswith(('linux', 'darwin', 'win32')):
+        # copy2 además copiaría metadatos innecesarios
+        shutil.copyfile(src, dst)
+    else:
+        copy_file_buffered(src, dst)
+
 class DatabaseMigrator:
     def __init__(self, db_path='emergency_system.db'):
         self.db_path = db_path
         self.backup_path = f"{db_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         self.migration_log = []
+        # Esquema leído una vez y actualizado con cada cambio de la migración
+        self.table_cache = None
+        self.column_cache = {}
         
     def log_migration(self, message):
         """Registrar mensaje de migración"""
@@ -42,7 +105,10 @@ class DatabaseMigrator:
         """Crear backup de la base de datos antes de migrar"""
         try:
             if os.path.exists(self.db_path):
-                shutil.copy2(self.db_path, self.backup_path)
+                # Volcar el WAL al archivo principal para que la copia esté
+                # completa; si SQLite no puede abrir la base se copia igual
+                checkpoint_database(self.db_path)
+                copy_database_file(self.db_path, self.backup_path)
                 self.log_migration(f"✅ Backup creado: {self.backup_path}")
                 return True
             else:
@@ -52,21 +118,26 @@ class DatabaseMigrator:
             self.log_migration(f"❌ Error creando backup: {e}")
             return False
     
+    def connect(self):
+        """Abrir la conexión de migración con los PRAGMAs de rendimiento"""
+        return open_database(self.db_path)
+    
     def check_table_exists(self, conn, table_name):
-        """Verificar si una tabla existe"""
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name=?
-        """, (table_name,))
-        result = cursor.fetchone()
-        return result is not None
+        """Verificar si una tabla existe (sqlite_master se lee una sola vez)"""
+        if self.table_cache is None:
+            self.table_cache = {
+                row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            }
+        return table_name in self.table_cache
     
     def check_column_exists(self, conn, table_name, column_name):
-        """Verificar si una columna existe en una tabla"""
-        cursor = conn.cursor()
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = [column[1] for column in cursor.fetchall()]
+        """Verificar si una columna existe en una tabla (columnas cacheadas por tabla)"""
+        columns = self.column_cache.get(table_name)
+        if columns is None:
+            # Nombre de tabla como parámetro: una sola sentencia preparada para todas
+            columns = self.column_cache[table_name] = {
+                row[0] for row in conn.execute("SELECT name FROM pragma_table_info(?)", (table_name,))
+            }
         return column_name in columns
     
     def add_column_if_not_exists(self, conn, table_name, column_name, column_definition):
@@ -76,6 +147,7 @@ class DatabaseMigrator:
                 cursor = conn.cursor()
                 cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_definition}")
                 conn.commit()
+                self.column_cache[table_name].add(column_name)
                 self.log_migration(f"✅ Columna '{column_name}' agregada a tabla '{table_name}'")
                 return True
             else:
@@ -189,20 +261,34 @@ class DatabaseMigrator:
         ]
         
         try:
-            cursor = conn.cursor()
-            configs_added = 0
+            conn.execute("BEGIN IMMEDIATE")
             
-            for clave, valor, descripcion, categoria in default_configs:
-                # Verificar si ya existe
-                cursor.execute("SELECT id FROM configuracion WHERE clave = ?", (clave,))
-                if cursor.fetchone() is None:
-                    # Insertar configuración
-                    cursor.execute("""
-                        INSERT INTO configuracion (clave, valor, descripcion, categoria, fecha_creacion, fecha_modificacion)
-                        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                    """, (clave, valor, descripcion, categoria))
-                    configs_added += 1
+            # INSERT OR IGNORE necesita clave UNIQUE; bases muy antiguas podrían
+            # no tenerla (las creadas por app.py o este script sí la tienen)
+            clave_unica = conn.execute("""
+                SELECT 1 FROM pragma_index_list('configuracion') l
+                JOIN pragma_index_info(l.name) i
+                WHERE l."unique" = 1 AND i.name = 'clave'
+            """).fetchone()
+            if clave_unica is None:
+                # Sin el índice pudieron quedar claves repetidas y el índice
+                # único fallaría: conservar la primera fila de cada clave
+                # (la que leía la app; el backup previo guarda el resto)
+                repetidas = conn.execute("""
+                    DELETE FROM configuracion
+                    WHERE id NOT IN (SELECT MIN(id) FROM configuracion GROUP BY clave)
+                """).rowcount
+                if repetidas > 0:
+                    self.log_migration(f"⚠️ {repetidas} configuraciones con clave repetida eliminadas")
+                conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_configuracion_clave ON configuracion (clave)")
             
+            # Una sentencia preparada y una transacción para todas las filas;
+            # las claves existentes se ignoran sin SELECT previo
+            cursor = conn.executemany("""
+                INSERT OR IGNORE INTO configuracion (clave, valor, descripcion, categoria, fecha_creacion, fecha_modificacion)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            """, default_configs)
+            configs_added = cursor.rowcount
             conn.commit()
             
             if configs_added > 0:
@@ -213,6 +299,8 @@ class DatabaseMigrator:
             return True
             
         except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
             self.log_migration(f"❌ Error insertando configuraciones por defecto: {e}")
             return False
     
@@ -223,10 +311,17 @@ class DatabaseMigrator:
         checks = []
         
         try:
-            cursor = conn.cursor()
+            # Esquema real (no el cacheado) de ambas tablas en una sola consulta
+            columns = {'personas': set(), 'usuarios': set()}
+            for table, column in conn.execute("""
+                SELECT m.name, p.name
+                FROM sqlite_master m JOIN pragma_table_info(m.name) p
+                WHERE m.type = 'table' AND m.name IN ('personas', 'usuarios')
+            """):
+                columns[table].add(column)
             
             # Verificar que campo email existe en personas
-            if self.check_column_exists(conn, 'personas', 'email'):
+            if 'email' in columns['personas']:
                 checks.append("✅ Campo 'email' existe en tabla 'personas'")
             else:
                 checks.append("❌ Campo 'email' NO existe en tabla 'personas'")
@@ -236,7 +331,7 @@ class DatabaseMigrator:
             user_columns_ok = True
             
             for column in critical_user_columns:
-                if self.check_column_exists(conn, 'usuarios', column):
+                if column in columns['usuarios']:
                     checks.append(f"✅ Campo '{column}' existe en tabla 'usuarios'")
                 else:
                     checks.append(f"❌ Campo '{column}' NO existe en tabla 'usuarios'")
@@ -245,17 +340,19 @@ class DatabaseMigrator:
             if user_columns_ok:
                 checks.append("✅ Todos los campos críticos en tabla 'usuarios'")
             
+            # Configuraciones y admins activos en una sola consulta
+            config_count, admin_count = conn.execute("""
+                SELECT (SELECT COUNT(*) FROM configuracion),
+                       (SELECT COUNT(*) FROM usuarios WHERE rol = 'admin' AND activo = 1)
+            """).fetchone()
+            
             # Verificar configuraciones
-            cursor.execute("SELECT COUNT(*) FROM configuracion")
-            config_count = cursor.fetchone()[0]
             if config_count > 0:
                 checks.append(f"✅ {config_count} configuraciones en base de datos")
             else:
                 checks.append("⚠️ No hay configuraciones en base de datos")
             
             # Verificar usuario admin
-            cursor.execute("SELECT COUNT(*) FROM usuarios WHERE rol = 'admin' AND activo = 1")
-            admin_count = cursor.fetchone()[0]
             if admin_count > 0:
                 checks.append(f"✅ {admin_count} usuario(s) admin activo(s)")
             else:
@@ -372,6 +469,9 @@ class DatabaseMigrator:
             """)
             
             conn.commit()
+            # El esquema cambió: descartar lo cacheado
+            self.table_cache = None
+            self.column_cache.clear()
             self.log_migration("✅ Todas las tablas creadas/verificadas correctamente")
             return True
             
@@ -390,7 +490,7 @@ class DatabaseMigrator:
                 return False
             
             # Conectar a la base de datos
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             
             # PASO 1: Crear todas las tablas si no existen
             if not self.create_tables_if_not_exist(conn):
@@ -8,10 +8,10 @@ Este script elimina la base de datos problemática y crea una nueva
 con la estructura correcta garantizada.
 """
 
-import sqlite3
 import os
-from datetime import datetime
-from werkzeug.security import generate_password_hash
+import time
+
+from utils.mantenimiento import open_database, move_database, seed_password_hash
 
 def print_banner():
     print("=" * 60)
@@ -26,14 +26,10 @@ def backup_current_database():
     print("-" * 40)
     
     if os.path.exists('emergency_system.db'):
-        backup_name = f"emergency_system.db.broken_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        backup_name = f"emergency_system.db.broken_{time.strftime('%Y%m%d_%H%M%S')}"
         try:
-            import shutil
-            shutil.copy2('emergency_system.db', backup_name)
+            move_database('emergency_system.db', backup_name)
             print(f"OK: Backup creado - {backup_name}")
-            
-            # Eliminar base de datos actual
-            os.remove('emergency_system.db')
             print("OK: Base de datos problemática eliminada")
             return True
         except Exception as e:
@@ -43,120 +39,119 @@ def backup_current_database():
         print("INFO: No hay base de datos actual para respaldar")
         return True
 
+# Esquema completo con sus índices en un solo script: un parseo y un único commit
+ESQUEMA_SQL = """
+BEGIN;
+
+CREATE TABLE usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    nombre VARCHAR(100) NOT NULL,
+    apellido VARCHAR(100) NOT NULL,
+    email VARCHAR(120),
+    telefono VARCHAR(20),
+    rol VARCHAR(20) DEFAULT 'operador' NOT NULL,
+    activo BOOLEAN DEFAULT 1,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    ultimo_login DATETIME,
+    llamados_atendidos INTEGER DEFAULT 0,
+    intentos_login INTEGER DEFAULT 0,
+    bloqueado_hasta DATETIME
+);
+
+CREATE TABLE personas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(100) NOT NULL,
+    apellido VARCHAR(100) NOT NULL,
+    documento VARCHAR(20),
+    telefono VARCHAR(20),
+    email VARCHAR(120),
+    direccion VARCHAR(200),
+    barrio VARCHAR(100),
+    fecha_nacimiento DATE,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    observaciones TEXT
+);
+
+CREATE TABLE llamados (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    nombre_llamante VARCHAR(100) NOT NULL,
+    telefono_llamante VARCHAR(20),
+    persona_id INTEGER,
+    nombre_afectado VARCHAR(100),
+    edad_afectado INTEGER,
+    sexo_afectado VARCHAR(1),
+    direccion VARCHAR(200) NOT NULL,
+    barrio VARCHAR(100) NOT NULL,
+    es_via_publica BOOLEAN DEFAULT 0,
+    punto_referencia VARCHAR(200),
+    tipo_emergencia VARCHAR(50) NOT NULL,
+    motivo_llamado TEXT NOT NULL,
+    prioridad VARCHAR(10) NOT NULL,
+    protocolo_107 TEXT,
+    estado VARCHAR(20) DEFAULT 'activo',
+    derivado_a VARCHAR(100),
+    observaciones TEXT,
+    fecha_cierre DATETIME,
+    whatsapp_enviado BOOLEAN DEFAULT 0,
+    whatsapp_respuesta TEXT,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios (id),
+    FOREIGN KEY (persona_id) REFERENCES personas (id)
+);
+
+CREATE TABLE guardias (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    actividad TEXT NOT NULL,
+    tipo VARCHAR(20) DEFAULT 'novedad',
+    observaciones TEXT,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+);
+
+CREATE TABLE configuracion (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave VARCHAR(100) UNIQUE NOT NULL,
+    valor TEXT,
+    descripcion VARCHAR(200),
+    categoria VARCHAR(50) DEFAULT 'general',
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    fecha_modificacion DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Índices: mismos nombres que los modelos de app.py (db.create_all no
+-- los crea si la tabla ya existe)
+CREATE INDEX ix_usuarios_activo ON usuarios (activo);
+CREATE INDEX ix_personas_apellido_nombre ON personas (apellido, nombre);
+CREATE INDEX ix_personas_documento ON personas (documento);
+CREATE INDEX ix_personas_telefono ON personas (telefono);
+CREATE INDEX ix_llamados_fecha ON llamados (fecha);
+CREATE INDEX ix_llamados_estado ON llamados (estado);
+CREATE INDEX ix_llamados_estado_fecha ON llamados (estado, fecha);
+CREATE INDEX ix_llamados_usuario_id ON llamados (usuario_id);
+CREATE INDEX ix_llamados_persona_id ON llamados (persona_id);
+CREATE INDEX ix_guardias_fecha ON guardias (fecha);
+CREATE INDEX ix_guardias_usuario_id ON guardias (usuario_id);
+
+COMMIT;
+"""
+
+TABLAS_ESQUEMA = ('usuarios', 'personas', 'llamados', 'guardias', 'configuracion')
+
 def create_fresh_database():
     """Crear base de datos completamente nueva"""
-    print("\n2. CREANDO BASE DE DATOS NUEVA")
+    print("\n2. CREANDO BASE DE DATOS NUEVA", flush=True)
     print("-" * 40)
     
     try:
-        conn = sqlite3.connect('emergency_system.db')
-        cursor = conn.cursor()
-        
-        # Crear tabla usuarios CON TODAS LAS COLUMNAS
-        print("Creando tabla usuarios...")
-        cursor.execute("""
-            CREATE TABLE usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                nombre VARCHAR(100) NOT NULL,
-                apellido VARCHAR(100) NOT NULL,
-                email VARCHAR(120),
-                telefono VARCHAR(20),
-                rol VARCHAR(20) DEFAULT 'operador' NOT NULL,
-                activo BOOLEAN DEFAULT 1,
-                fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
-                ultimo_login DATETIME,
-                llamados_atendidos INTEGER DEFAULT 0,
-                intentos_login INTEGER DEFAULT 0,
-                bloqueado_hasta DATETIME
-            )
-        """)
-        print("OK: Tabla usuarios creada")
-        
-        # Crear tabla personas CON CAMPO EMAIL
-        print("Creando tabla personas...")
-        cursor.execute("""
-            CREATE TABLE personas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre VARCHAR(100) NOT NULL,
-                apellido VARCHAR(100) NOT NULL,
-                documento VARCHAR(20),
-                telefono VARCHAR(20),
-                email VARCHAR(120),
-                direccion VARCHAR(200),
-                barrio VARCHAR(100),
-                fecha_nacimiento DATE,
-                fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
-                observaciones TEXT
-            )
-        """)
-        print("OK: Tabla personas creada")
+        conn = open_database()
+        conn.executescript(ESQUEMA_SQL)
+        for tabla in TABLAS_ESQUEMA:
+            print(f"OK: Tabla {tabla} creada")
         
-        # Crear tabla llamados
-        print("Creando tabla llamados...")
-        cursor.execute("""
-            CREATE TABLE llamados (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                usuario_id INTEGER NOT NULL,
-                nombre_llamante VARCHAR(100) NOT NULL,
-                telefono_llamante VARCHAR(20),
-                persona_id INTEGER,
-                nombre_afectado VARCHAR(100),
-                edad_afectado INTEGER,
-                sexo_afectado VARCHAR(1),
-                direccion VARCHAR(200) NOT NULL,
-                barrio VARCHAR(100) NOT NULL,
-                es_via_publica BOOLEAN DEFAULT 0,
-                punto_referencia VARCHAR(200),
-                tipo_emergencia VARCHAR(50) NOT NULL,
-                motivo_llamado TEXT NOT NULL,
-                prioridad VARCHAR(10) NOT NULL,
-                protocolo_107 TEXT,
-                estado VARCHAR(20) DEFAULT 'activo',
-                derivado_a VARCHAR(100),
-                observaciones TEXT,
-                fecha_cierre DATETIME,
-                whatsapp_enviado BOOLEAN DEFAULT 0,
-                whatsapp_respuesta TEXT,
-                FOREIGN KEY (usuario_id) REFERENCES usuarios (id),
-                FOREIGN KEY (persona_id) REFERENCES personas (id)
-            )
-        """)
-        print("OK: Tabla llamados creada")
-        
-        # Crear tabla guardias
-        print("Creando tabla guardias...")
-        cursor.execute("""
-            CREATE TABLE guardias (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                usuario_id INTEGER NOT NULL,
-                actividad TEXT NOT NULL,
-                tipo VARCHAR(20) DEFAULT 'novedad',
-                observaciones TEXT,
-                FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
-            )
-        """)
-        print("OK: Tabla guardias creada")
-        
-        # Crear tabla configuracion
-        print("Creando tabla configuracion...")
-        cursor.execute("""
-            CREATE TABLE configuracion (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                clave VARCHAR(100) UNIQUE NOT NULL,
-                valor TEXT,
-                descripcion VARCHAR(200),
-                categoria VARCHAR(50) DEFAULT 'general',
-                fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
-                fecha_modificacion DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        print("OK: Tabla configuracion creada")
-        
-        conn.commit()
         return conn
         
     except Exception as e:
@@ -165,17 +160,22 @@ def create_fresh_database():
 
 def insert_initial_data(conn):
     """Insertar datos iniciales garantizados"""
-    print("\n3. INSERTANDO DATOS INICIALES")
+    print("\n3. INSERTANDO DATOS INICIALES", flush=True)
     print("-" * 40)
     
-    cursor = conn.cursor()
-    
     try:
+        # El hash se calcula antes de tomar el bloqueo de escritura
+        password_hash = seed_password_hash('123456')
+        
+        # Todo el alta inicial en una transacción explícita: un solo commit
+        # (un fsync). Con BEGIN abierto, sqlite3 no agrega BEGIN/COMMIT implícitos
+        conn.execute("BEGIN IMMEDIATE")
+        
         # Crear usuario admin
         print("Creando usuario administrador...")
-        password_hash = generate_password_hash('123456')
-        cursor.execute("""
-            INSERT INTO usuarios (
+        # OR IGNORE sobre username UNIQUE: re-ejecutar el alta no falla
+        conn.execute("""
+            INSERT OR IGNORE INTO usuarios (
                 username, password_hash, nombre, apellido, email, rol, 
                 activo, llamados_atendidos, intentos_login
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -186,7 +186,7 @@ def insert_initial_data(conn):
         print("OK: Usuario admin creado")
         
         # Crear guardia de inicialización
-        cursor.execute("""
+        conn.execute("""
             INSERT INTO guardias (usuario_id, actividad, tipo)
             VALUES (1, 'Sistema recreado desde cero - Base de datos nueva', 'sistema')
         """)
@@ -211,32 +211,48 @@ def insert_initial_data(conn):
             ('backup_automatico', 'true', 'Backup automático', 'sistema')
         ]
         
-        for clave, valor, descripcion, categoria in default_configs:
-            cursor.execute("""
-                INSERT INTO configuracion (clave, valor, descripcion, categoria)
-                VALUES (?, ?, ?, ?)
-            """, (clave, valor, descripcion, categoria))
+        # Una sola sentencia preparada para todas las filas; OR IGNORE sobre
+        # clave UNIQUE hace la carga idempotente
+        cursor = conn.executemany("""
+            INSERT OR IGNORE INTO configuracion (clave, valor, descripcion, categoria)
+            VALUES (?, ?, ?, ?)
+        """, default_configs)
         
-        print(f"OK: {len(default_configs)} configuraciones insertadas")
+        print(f"OK: {cursor.rowcount} configuraciones insertadas")
         
         conn.commit()
         return True
         
     except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
         print(f"ERROR: No se pudieron insertar datos iniciales - {e}")
         return False
 
+def load_all_columns(conn, tables):
+    """Columnas de varias tablas en una sola consulta: {tabla: {columna, ...}}"""
+    marcadores = ','.join('?' * len(tables))
+    rows = conn.execute(f"""
+        SELECT m.name, p.name
+        FROM sqlite_master m JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table' AND m.name IN ({marcadores})
+    """, tuple(tables)).fetchall()
+    columns = {table: set() for table in tables}
+    for table, column in rows:
+        columns[table].add(column)
+    return columns
+
 def verify_new_database(conn):
     """Verificar que la nueva base de datos sea correcta"""
-    print("\n4. VERIFICANDO NUEVA BASE DE DATOS")
+    print("\n4. VERIFICANDO NUEVA BASE DE DATOS", flush=True)
     print("-" * 40)
     
-    cursor = conn.cursor()
-    
     try:
+        # Estructura de usuarios y personas en una sola consulta
+        columns = load_all_columns(conn, ('usuarios', 'personas'))
+        
         # Verificar tabla usuarios
-        cursor.execute("PRAGMA table_info(usuarios)")
-        user_columns = [col[1] for col in cursor.fetchall()]
+        user_columns = columns['usuarios']
         required_user_columns = [
             'id', 'username', 'password_hash', 'nombre', 'apellido',
             'email', 'telefono', 'rol', 'activo', 'fecha_creacion',
@@ -251,40 +267,33 @@ def verify_new_database(conn):
             print("OK: Tabla usuarios tiene todas las columnas requeridas")
         
         # Verificar tabla personas
-        cursor.execute("PRAGMA table_info(personas)")
-        person_columns = [col[1] for col in cursor.fetchall()]
+        person_columns = columns['personas']
         if 'email' in person_columns:
             print("OK: Tabla personas tiene campo email")
         else:
             print("ERROR: Tabla personas NO tiene campo email")
             return False
         
-        # Verificar usuario admin
-        cursor.execute("SELECT COUNT(*) FROM usuarios WHERE username = 'admin'")
-        admin_count = cursor.fetchone()[0]
-        if admin_count > 0:
-            print(f"OK: Usuario admin existe ({admin_count} registros)")
-        else:
+        # Admin, su columna llamados_atendidos y total de configuraciones en
+        # una sola consulta: que la fila exista ya prueba que el admin existe
+        result = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM configuracion), username, llamados_atendidos
+            FROM usuarios WHERE username = 'admin'
+        """).fetchone()
+        if result is None:
             print("ERROR: Usuario admin no existe")
             return False
+        config_count, username, atendidos = result
+        print("OK: Usuario admin existe")
         
         # Verificar configuraciones
-        cursor.execute("SELECT COUNT(*) FROM configuracion")
-        config_count = cursor.fetchone()[0]
         if config_count > 0:
             print(f"OK: Configuraciones existen ({config_count} registros)")
         else:
             print("ERROR: No hay configuraciones")
             return False
         
-        # Probar consulta problemática específicamente
-        cursor.execute("SELECT username, llamados_atendidos FROM usuarios WHERE username = 'admin'")
-        result = cursor.fetchone()
-        if result:
-            print(f"OK: Consulta de 'llamados_atendidos' exitosa - {result}")
-        else:
-            print("ERROR: No se puede consultar llamados_atendidos")
-            return False
+        print(f"OK: Consulta de 'llamados_atendidos' exitosa - {(username, atendidos)}")
         
         print("OK: Todas las verificaciones pasaron")
         return True
@@ -356,4 +365,7 @@ def main():
 
 if __name__ == '__main__':
     import sys
+    # stdout con buffer completo (no por línea): se vuelca al comenzar cada
+    # sección (flush=True en los encabezados) y al salir
+    sys.stdout.reconfigure(line_buffering=False)
     sys.exit(main())
\ No newline at end of file
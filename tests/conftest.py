@@ -0,0 +1,47 @@
+"""Fixtures de pruebas: la app sobre una base SQLite temporal"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# La base de pruebas se define antes de importar app (el engine se crea al
+# importar). app crea logs/, backups/, etc. en el directorio actual: trabajar
+# en uno temporal para no tocar los del repositorio
+DIRECTORIO_PRUEBAS = tempfile.mkdtemp(prefix='emergencias-test-')
+os.environ['EMERG_DATABASE_URI'] = 'sqlite:///' + os.path.join(DIRECTORIO_PRUEBAS, 'test.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(DIRECTORIO_PRUEBAS)
+
+from app import app as flask_app, db, init_database  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        init_database()
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def logged_client(client):
+    """Cliente con sesión iniciada como el admin inicial"""
+    response = client.post('/login', data={'username': 'admin', 'password': '123456'})
+    assert response.status_code == 302
+    return client
+
+
+LLAMADO = {
+    'nombre_llamante': 'Ana',
+    'direccion': 'San Martín 100',
+    'barrio': 'Centro',
+    'tipo_emergencia': 'Médica',
+    'motivo_llamado': 'Dolor de pecho',
+    'prioridad': 'rojo',
+}
@@ -0,0 +1,26 @@
+"""Pruebas de la cache de configuración"""
+from sqlalchemy import text
+
+from app import Configuracion, db
+from utils import configuracion
+from utils.configuracion import obtener_configuracion
+
+
+def test_cambio_orm_descarta_la_cache(app):
+    with app.app_context():
+        obtener_configuracion()
+        db.session.add(Configuracion(clave='prueba_orm', valor='1'))
+        db.session.commit()
+        assert obtener_configuracion()['prueba_orm'] == '1'
+
+
+def test_cambio_externo_se_ve_al_vencer_el_ttl(app, monkeypatch):
+    with app.app_context():
+        obtener_configuracion()
+        # Escritura que no pasa por el ORM (otro proceso, script o SQL directo)
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO configuracion (clave, valor) VALUES ('prueba_sql', '2')"))
+        assert 'prueba_sql' not in obtener_configuracion()
+        
+        monkeypatch.setitem(configuracion.CONFIG_CACHE, 'vence', 0.0)
+        assert obtener_configuracion()['prueba_sql'] == '2'
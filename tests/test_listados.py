@@ -0,0 +1,70 @@
+"""Pruebas del cache HTTP (ETag) de los listados"""
+import pytest
+from sqlalchemy import text
+
+from app import db
+from conftest import LLAMADO
+
+
+def etag_actual(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def test_listado_sin_cambios_responde_304(logged_client):
+    etag = etag_actual(logged_client, '/api/llamados')
+    response = logged_client.get('/api/llamados', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_alta_cambia_etag(logged_client):
+    etag = etag_actual(logged_client, '/api/llamados')
+    assert logged_client.post('/api/llamados', json=LLAMADO).get_json()['success']
+    response = logged_client.get('/api/llamados', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_edicion_con_sql_directo_cambia_etag(app, logged_client):
+    logged_client.post('/api/llamados', json=LLAMADO)
+    etag = etag_actual(logged_client, '/api/llamados')
+    # Escritura fuera del ORM (como la de un script de mantenimiento):
+    # no cambia MAX(id) ni COUNT(*)
+    with app.app_context(), db.engine.begin() as conn:
+        conn.execute(text("UPDATE llamados SET estado = 'cerrado' WHERE id = (SELECT MAX(id) FROM llamados)"))
+    response = logged_client.get('/api/llamados', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_cambio_de_nombre_del_operador_cambia_etag(app, logged_client):
+    logged_client.post('/api/llamados', json=LLAMADO)
+    etag = etag_actual(logged_client, '/api/llamados')
+    with app.app_context(), db.engine.begin() as conn:
+        conn.execute(text("UPDATE usuarios SET nombre = nombre || 'x' WHERE username = 'admin'"))
+    response = logged_client.get('/api/llamados', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_etag_con_sufijo_de_compresion_responde_304(logged_client):
+    etag = etag_actual(logged_client, '/api/llamados').strip('"')
+    for algoritmo in ('br', 'gzip'):
+        response = logged_client.get(
+            '/api/llamados', headers={'If-None-Match': f'"{etag}:{algoritmo}"'}
+        )
+        assert response.status_code == 304
+        assert response.headers['ETag'] == f'"{etag}:{algoritmo}"'
+
+
+def test_etag_comprimido_responde_304(logged_client):
+    pytest.importorskip('flask_compress')
+    # Por encima de COMPRESS_MIN_SIZE (500 bytes)
+    for _ in range(5):
+        logged_client.post('/api/llamados', json=LLAMADO)
+    response = logged_client.get('/api/llamados', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers.get('Content-Encoding') == 'gzip'
+    etag = response.headers['ETag']
+    assert etag.endswith(':gzip"')
+    response = logged_client.get(
+        '/api/llamados', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}
+    )
+    assert response.status_code == 304
@@ -0,0 +1,24 @@
+"""Pruebas de la cache de usuarios de Flask-Login"""
+from app import USUARIOS_CACHE, Usuario, UsuarioSesion
+from conftest import LLAMADO
+
+
+def test_peticion_fallida_no_rompe_la_sesion(logged_client):
+    # Lista en lugar de objeto: el alta falla y hace rollback
+    response = logged_client.post('/api/llamados', json=[1])
+    assert response.get_json()['success'] is False
+    
+    # El usuario cacheado sigue siendo utilizable en las peticiones siguientes
+    assert logged_client.get('/dashboard').status_code == 200
+    assert logged_client.post('/api/llamados', json=LLAMADO).get_json()['success']
+
+
+def test_logout_descarta_el_usuario_cacheado(app, logged_client):
+    with app.app_context():
+        admin_id = Usuario.query.filter_by(username='admin').one().id
+    assert logged_client.get('/dashboard').status_code == 200
+    assert isinstance(USUARIOS_CACHE[admin_id][1], UsuarioSesion)
+    
+    logged_client.get('/logout')
+    assert admin_id not in USUARIOS_CACHE
+    assert logged_client.get('/dashboard').status_code == 302
@@ -0,0 +1,47 @@
+"""Pruebas de los scripts de recuperación de la base"""
+import glob
+import os
+import shutil
+
+import pytest
+
+import fix_final
+import recreate_database
+
+
+@pytest.mark.parametrize('descartar', [
+    fix_final.remove_problematic_database,
+    recreate_database.backup_current_database,
+])
+def test_base_corrupta_se_mueve_al_backup(tmp_path, monkeypatch, descartar):
+    # Archivo que SQLite no puede abrir ("file is not a database") con un WAL huérfano
+    monkeypatch.chdir(tmp_path)
+    contenido = os.urandom(8192)
+    with open('emergency_system.db', 'wb') as f:
+        f.write(contenido)
+    with open('emergency_system.db-wal', 'wb') as f:
+        f.write(b'wal')
+    
+    assert descartar() is True
+    
+    assert not os.path.exists('emergency_system.db')
+    assert not os.path.exists('emergency_system.db-wal')
+    backups = [p for p in glob.glob('emergency_system.db.*') if not p.endswith('-wal')]
+    assert len(backups) == 1
+    with open(backups[0], 'rb') as f:
+        assert f.read() == contenido
+    with open(backups[0] + '-wal', 'rb') as f:
+        assert f.read() == b'wal'
+
+
+def test_limpieza_de_cache_recorre_subdirectorios(tmp_path, monkeypatch):
+    for directorio in ('__pycache__', 'utils/__pycache__', 'tests/__pycache__'):
+        (tmp_path / directorio).mkdir(parents=True)
+        (tmp_path / directorio / 'modulo.cpython-311.pyc').write_bytes(b'')
+    (tmp_path / 'utils' / 'suelto.pyc').write_bytes(b'')
+    monkeypatch.chdir(tmp_path)
+    
+    fix_final.clean_cache_dir('.', shutil.rmtree)
+    
+    assert list(tmp_path.rglob('*.pyc')) == []
+    assert list(tmp_path.rglob('__pycache__')) == []
@@ -0,0 +1,48 @@
+"""Pruebas de la migración de la base de datos"""
+import os
+import sqlite3
+
+from migrate_database import DatabaseMigrator
+
+
+def test_configuraciones_con_clave_repetida(tmp_path):
+    # Base antigua: sin índice único en clave y con claves repetidas
+    db_path = str(tmp_path / 'antigua.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE configuracion (
+            id INTEGER PRIMARY KEY, clave VARCHAR(100) NOT NULL, valor TEXT,
+            descripcion VARCHAR(200), categoria VARCHAR(50),
+            fecha_creacion DATETIME, fecha_modificacion DATETIME
+        );
+        INSERT INTO configuracion (clave, valor) VALUES
+            ('telefono_supervisor', '351111'),
+            ('telefono_supervisor', '351222'),
+            ('whatsapp_token', 'abc');
+    """)
+    
+    assert DatabaseMigrator(db_path).insert_default_configurations(conn)
+    
+    filas = conn.execute("""
+        SELECT clave, COUNT(*), MIN(valor) FROM configuracion GROUP BY clave
+    """).fetchall()
+    conn.close()
+    assert all(cantidad == 1 for _, cantidad, _ in filas)
+    valores = {clave: valor for clave, _, valor in filas}
+    assert valores['telefono_supervisor'] == '351111'
+    assert valores['whatsapp_token'] == 'abc'
+    assert 'backup_automatico' in valores
+
+
+def test_backup_de_base_corrupta(tmp_path):
+    # SQLite no puede abrirla: el checkpoint se omite y el archivo se copia igual
+    db_path = tmp_path / 'emergency_system.db'
+    contenido = os.urandom(8192)
+    db_path.write_bytes(contenido)
+    migrador = DatabaseMigrator(str(db_path))
+    
+    assert migrador.create_backup()
+    
+    with open(migrador.backup_path, 'rb') as f:
+        assert f.read() == contenido
+    assert db_path.read_bytes() == contenido
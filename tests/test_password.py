@@ -0,0 +1,24 @@
+"""Pruebas de los hashes de contraseña"""
+import pytest
+from werkzeug.security import generate_password_hash
+
+import app as aplicacion
+
+
+@pytest.mark.parametrize('metodo, esperado', [
+    ('pbkdf2:sha256:50000', True),
+    ('pbkdf2:sha256:150000', False),
+    ('pbkdf2:sha256:600000', False),
+    ('scrypt', False),
+])
+def test_requiere_rehash_sin_argon2(monkeypatch, metodo, esperado):
+    monkeypatch.setattr(aplicacion, 'password_hasher', None)
+    password_hash = generate_password_hash('123456', method=metodo)
+    assert aplicacion.requiere_rehash(password_hash) is esperado
+
+
+def test_requiere_rehash_con_argon2():
+    if aplicacion.password_hasher is None:
+        pytest.skip('argon2-cffi no está instalado')
+    assert aplicacion.requiere_rehash(generate_password_hash('123456', method='pbkdf2:sha256:150000'))
+    assert not aplicacion.requiere_rehash(aplicacion.generar_hash_password('123456'))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema de Emergencias Villa Allende
+Cache de la tabla configuracion
+
+No importa app: lo usan app.py y los módulos de utils/ (WhatsApp) sin
+cargar toda la aplicación web. Requiere un contexto de aplicación Flask
+con Flask-SQLAlchemy inicializado.
+"""
+
+from time import monotonic
+
+from flask import current_app
+from sqlalchemy import text
+
+# Diccionario clave -> valor, leído una sola vez por período. Los cambios
+# ORM de este proceso lo descartan al instante; el TTL acota cuánto tarda
+# en verse un cambio hecho por otro proceso, un script o SQL directo.
+CONFIG_CACHE_TTL = 30  # segundos
+CONFIG_CACHE = {'datos': None, 'vence': 0.0}
+
+def obtener_sesion():
+    """Sesión de SQLAlchemy de la aplicación actual"""
+    return current_app.extensions['sqlalchemy'].session
+
+def obtener_configuracion():
+    """Configuración completa como dict (cacheada en memoria)"""
+    ahora = monotonic()
+    datos = CONFIG_CACHE['datos']
+    if datos is None or CONFIG_CACHE['vence'] <= ahora:
+        datos = dict(obtener_sesion().execute(
+            text("SELECT clave, valor FROM configuracion")
+        ).all())
+        CONFIG_CACHE['datos'] = datos
+        CONFIG_CACHE['vence'] = ahora + CONFIG_CACHE_TTL
+    return datos
+
+def invalidar_configuracion():
+    """Descartar la configuración cacheada"""
+    CONFIG_CACHE['datos'] = None
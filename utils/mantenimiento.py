@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema de Emergencias Villa Allende
+Utilidades compartidas por los scripts de mantenimiento de la base
+
+Las usan fix_final.py, recreate_database.py, fix_missing_column.py y
+migrate_database.py. Solo dependen de la biblioteca estándar (werkzeug se
+importa recién al hashear): no cargan la aplicación web.
+"""
+
+import os
+import sqlite3
+
+# PRAGMAs de rendimiento aplicados al abrir la conexión (mismos criterios que
+# app.py): WAL y synchronous=NORMAL evitan un fsync por commit; cache y tablas
+# temporales en memoria. Una base ':memory:' ignora el journal_mode=WAL
+PRAGMAS_RENDIMIENTO = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA cache_size=-65536;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA busy_timeout=5000;
+    PRAGMA mmap_size=268435456;
+    PRAGMA foreign_keys=ON;
+"""
+
+def open_database(path='emergency_system.db'):
+    """Abrir la base de datos con los PRAGMAs de rendimiento"""
+    conn = sqlite3.connect(path)
+    conn.executescript(PRAGMAS_RENDIMIENTO)
+    return conn
+
+# Cabecera de todo archivo de base SQLite 3
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+def checkpoint_database(path='emergency_system.db'):
+    """Volcar el WAL al archivo principal antes de mover o copiar la base
+
+    Solo es una optimización: una base dañada (justo la que estos scripts
+    reemplazan) no se puede abrir, y el archivo se mueve o copia igual.
+    """
+    # Sin la cabecera de SQLite ni se intenta abrirla: al cerrar la conexión
+    # SQLite borraría el -wal que acompaña al archivo
+    with open(path, 'rb') as f:
+        if f.read(16) != SQLITE_HEADER:
+            return
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        pass
+
+def move_database(path, backup_path):
+    """Renombrar la base y sus -wal/-shm restantes al nombre del backup
+
+    La base se descarta: renombrarla es el backup (sin copiar bytes).
+    """
+    checkpoint_database(path)
+    os.replace(path, backup_path)
+    for sufijo in ('-wal', '-shm'):
+        if os.path.exists(path + sufijo):
+            os.replace(path + sufijo, backup_path + sufijo)
+
+# Hash del admin inicial: mismo costo que usa app.py (PBKDF2 150k). Si
+# argon2-cffi está instalado, la app lo rehashea con Argon2id en su primer
+# login; si no, ya es el esquema de la app y se conserva.
+# EMERG_SEED_STRONG=1 usa el default de Werkzeug
+SEED_HASH_METHOD = None if os.environ.get('EMERG_SEED_STRONG') == '1' else 'pbkdf2:sha256:150000'
+
+def seed_password_hash(password):
+    """Hash para el usuario semilla"""
+    # Import diferido: si se cancela en la confirmación no se carga werkzeug
+    from werkzeug.security import generate_password_hash
+    
+    if SEED_HASH_METHOD is None:
+        return generate_password_hash(password)
+    return generate_password_hash(password, method=SEED_HASH_METHOD)
@@ -14,8 +14,12 @@ Funcionalidades:
 import requests
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Envíos en paralelo: la latencia no crece con la cantidad de destinatarios
+envios_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='whatsapp')
+
 class WhatsAppManager:
     def __init__(self):
         self.base_url = "https://www.waboxapp.com/api/send/chat"
@@ -30,15 +34,14 @@ class WhatsAppManager:
         """Cargar configuración desde base de datos"""
         try:
             # Intentar cargar desde configuración si está disponible
-            from models import Configuracion
+            from utils.configuracion import obtener_configuracion
             
-            token_config = Configuracion.query.filter_by(clave='whatsapp_token').first()
-            uid_config = Configuracion.query.filter_by(clave='whatsapp_uid').first()
+            config = obtener_configuracion()
             
-            if token_config:
-                self.token = token_config.valor
-            if uid_config:
-                self.uid = uid_config.valor
+            if 'whatsapp_token' in config:
+                self.token = config['whatsapp_token']
+            if 'whatsapp_uid' in config:
+                self.uid = config['whatsapp_uid']
                 
         except Exception as e:
             self.logger.warning(f"No se pudo cargar configuración WhatsApp: {e}")
@@ -50,25 +53,26 @@ class WhatsAppManager:
         
         # Guardar en base de datos si es posible
         try:
-            from models import Configuracion, db
+            from sqlalchemy import text
+            from utils.configuracion import obtener_sesion, invalidar_configuracion
             
-            # Actualizar o crear token
-            token_config = Configuracion.query.filter_by(clave='whatsapp_token').first()
-            if token_config:
-                token_config.valor = token
-            else:
-                token_config = Configuracion(clave='whatsapp_token', valor=token)
-                db.session.add(token_config)
+            sesion = obtener_sesion()
             
-            # Actualizar o crear UID
-            uid_config = Configuracion.query.filter_by(clave='whatsapp_uid').first()
-            if uid_config:
-                uid_config.valor = uid
-            else:
-                uid_config = Configuracion(clave='whatsapp_uid', valor=uid)
-                db.session.add(uid_config)
-            
-            db.session.commit()
+            # Token y UID en una sola sentencia preparada: el índice único de
+            # clave resuelve "actualizar o crear" sin SELECT previo
+            ahora = datetime.utcnow()
+            sesion.execute(text("""
+                INSERT INTO configuracion (clave, valor, categoria, fecha_creacion, fecha_modificacion)
+                VALUES (:clave, :valor, 'whatsapp', :fecha, :fecha)
+                ON CONFLICT(clave) DO UPDATE SET
+                    valor = excluded.valor, fecha_modificacion = excluded.fecha_modificacion
+            """), [
+                {'clave': 'whatsapp_token', 'valor': token, 'fecha': ahora},
+                {'clave': 'whatsapp_uid', 'valor': uid, 'fecha': ahora}
+            ])
+            sesion.commit()
+            # SQL directo no dispara los eventos del modelo
+            invalidar_configuracion()
             self.logger.info("Configuración WhatsApp guardada")
             
         except Exception as e:
@@ -209,46 +213,49 @@ class WhatsAppManager:
         destinatarios = []
         
         try:
-            from models import Configuracion
+            from utils.configuracion import obtener_configuracion
+            
+            # Un solo dict en memoria en lugar de una consulta por clave
+            config = obtener_configuracion()
             
             # Siempre incluir supervisor si está configurado
-            supervisor = Configuracion.query.filter_by(clave='telefono_supervisor').first()
-            if supervisor and supervisor.valor:
-                destinatarios.append(supervisor.valor)
+            supervisor = config.get('telefono_supervisor')
+            if supervisor:
+                destinatarios.append(supervisor)
             
             # Destinatarios específicos según tipo y contexto
             if llamado.tipo == 'medica':
                 if llamado.via_publica == 'domicilio':
                     if llamado.prioridad in ['rojo', 'amarillo']:
                         # DEMVA para emergencias rojas/amarillas en domicilio
-                        demva = Configuracion.query.filter_by(clave='telefono_demva').first()
-                        if demva and demva.valor:
-                            destinatarios.append(demva.valor)
+                        demva = config.get('telefono_demva')
+                        if demva:
+                            destinatarios.append(demva)
                     else:
                         # TELEMEDICINA para verdes en domicilio
-                        telemedicina = Configuracion.query.filter_by(clave='telefono_telemedicina').first()
-                        if telemedicina and telemedicina.valor:
-                            destinatarios.append(telemedicina.valor)
+                        telemedicina = config.get('telefono_telemedicina')
+                        if telemedicina:
+                            destinatarios.append(telemedicina)
                 else:
                     # CEC para todas las emergencias en vía pública
-                    cec = Configuracion.query.filter_by(clave='telefono_cec').first()
-                    if cec and cec.valor:
-                        destinatarios.append(cec.valor)
+                    cec = config.get('telefono_cec')
+                    if cec:
+                        destinatarios.append(cec)
             
             elif llamado.tipo == 'bomberos':
-                bomberos = Configuracion.query.filter_by(clave='telefono_bomberos').first()
-                if bomberos and bomberos.valor:
-                    destinatarios.append(bomberos.valor)
+                bomberos = config.get('telefono_bomberos')
+                if bomberos:
+                    destinatarios.append(bomberos)
             
             elif llamado.tipo == 'seguridad':
-                seguridad = Configuracion.query.filter_by(clave='telefono_seguridad').first()
-                if seguridad and seguridad.valor:
-                    destinatarios.append(seguridad.valor)
+                seguridad = config.get('telefono_seguridad')
+                if seguridad:
+                    destinatarios.append(seguridad)
             
             elif llamado.tipo == 'defensa':
-                defensa = Configuracion.query.filter_by(clave='telefono_defensa').first()
-                if defensa and defensa.valor:
-                    destinatarios.append(defensa.valor)
+                defensa = config.get('telefono_defensa')
+                if defensa:
+                    destinatarios.append(defensa)
             
         except Exception as e:
             self.logger.error(f"Error obteniendo destinatarios: {e}")
@@ -282,12 +289,16 @@ class WhatsAppManager:
                     'error': 'No hay destinatarios configurados'
                 }
             
-            # Enviar a todos los destinatarios
+            # Enviar a todos los destinatarios (en paralelo)
             enviados = 0
             errores = []
             
-            for destinatario in destinatarios:
-                if self.send_message(destinatario, mensaje):
+            resultados = envios_executor.map(
+                lambda destinatario: self.send_message(destinatario, mensaje),
+                destinatarios
+            )
+            for destinatario, enviado in zip(destinatarios, resultados):
+                if enviado:
                     enviados += 1
                 else:
                     errores.append(destinatario)
@@ -370,8 +381,9 @@ class WhatsAppManager:
         if self.is_configured():
             # Obtener configuración de destinatarios
             try:
-                from models import Configuracion
+                from utils.configuracion import obtener_configuracion
                 
+                config = obtener_configuracion()
                 destinatarios_config = [
                     'telefono_supervisor',
                     'telefono_demva',
@@ -384,8 +396,7 @@ class WhatsAppManager:
                 
                 destinatarios = {}
                 for config_key in destinatarios_config:
-                    config = Configuracion.query.filter_by(clave=config_key).first()
-                    destinatarios[config_key] = bool(config and config.valor)
+                    destinatarios[config_key] = bool(config.get(config_key))
                 
                 status['destinatarios'] = destinatarios
                 
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistema de Emergencias Villa Allende
+Punto de entrada WSGI para producción
+
+El servidor de desarrollo de Flask (app.run) atiende pocas peticiones en
+paralelo. En producción usar un servidor WSGI con un pool de hilos:
+
+    Windows:  python wsgi.py                  (waitress)
+    Linux:    gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+
+Usar UN solo proceso con varios hilos. Las caches de usuarios, de
+configuración, de estadísticas del dashboard y de verificación de
+contraseñas son por proceso: con varios workers un logout, un cambio de
+rol o de configuración solo se aplicaría en el worker que lo atendió.
+Con SQLite un proceso alcanza: WAL permite lecturas concurrentes y el
+pool de conexiones del engine se comparte entre hilos.
+"""
+
+import os
+import logging
+
+from app import app, init_database
+
+# Inicializar base de datos una sola vez al cargar el módulo
+with app.app_context():
+    init_database()
+
+if __name__ == '__main__':
+    try:
+        from waitress import serve
+    except ImportError:
+        logging.warning("waitress no instalado, usando servidor de desarrollo de Flask")
+        app.run(debug=False, host='0.0.0.0', port=5000, threaded=True)
+    else:
+        hilos = int(os.environ.get('WSGI_THREADS', 8))
+        logging.info(f"Iniciando waitress en puerto 5000 con {hilos} hilos")
+        serve(app, host='0.0.0.0', port=5000, threads=hilos)